@@ -0,0 +1,113 @@
+"""Compare rendering the Goodreads page template with Jinja + json.loads against
+the compiled template.
+
+Usage: python benchmarks/bench_metadata.py [--entries 5000]
+
+Requires jinja2, which the sync itself no longer needs, see requirements.txt.
+"""
+
+import argparse
+import gc
+import json
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+import jinja2
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from notion_sync.book_info import get_clean_book_info  # noqa: E402
+from notion_sync.goodreads import description_markdown  # noqa: E402
+from notion_sync.templates import CompiledTemplate  # noqa: E402
+
+TEMPLATE_PATH = ROOT.joinpath("goodreads", "notion_page_book_template.json")
+
+
+def make_entry(n: int, rng: random.Random) -> dict[str, str]:
+    """The fields of a feed entry the template is filled from, with the double
+    quotes and backslashes that real titles and descriptions contain"""
+    words = ["".join(rng.choices(string.ascii_lowercase, k=7)) for _ in range(250)]
+    title = f'The "{words[0]}" Book {n}'
+    words[rng.randrange(250)] = '"quoted"'
+    words[rng.randrange(250)] = "C:\\Books\\"
+    return {
+        "author_name": f"Author {n}",
+        "book_description": "<p>" + " ".join(words) + "</p>",
+        "book_id": str(n),
+        "book_title": title,
+        "cover_url": f"https://images.example.com/{n}.jpg",
+        "series": f"Series {n % 50}",
+        "shelf": "read",
+        "series_num": str(n % 7),
+        "subtitle": "",
+    }
+
+
+def compiled_values(entry: dict[str, str]) -> dict[str, str]:
+    """The values the sync fills the compiled template with"""
+    description = description_markdown(entry["book_description"])
+    title = get_clean_book_info(entry["book_title"]).title
+    return {**entry, "book_description": description[:2000], "book_title": title}
+
+
+def jinja_values(entry: dict[str, str]) -> dict[str, str]:
+    """The values the sync used to render the Jinja template with.
+
+    Double quotes in the title and description were swapped for single ones.
+    Nothing else was escaped, so a backslash made the JSON invalid and the
+    page was skipped; they're escaped here so the output can be compared.
+    """
+    from html_to_markdown import convert
+
+    description = convert(entry["book_description"])["content"].replace("\n", "")
+    values = {
+        **entry,
+        "book_description": description.replace('"', "'")[:2000],
+        "book_title": entry["book_title"].replace(":", "").replace('"', "'").strip(),
+    }
+    return {name: json.dumps(value)[1:-1] for name, value in values.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    entries = [make_entry(n, rng) for n in range(args.entries)]
+    old_values = [jinja_values(entry) for entry in entries]
+    new_values = [compiled_values(entry) for entry in entries]
+
+    with open(TEMPLATE_PATH) as f:
+        jinja_template = jinja2.Template(f.read())
+    compiled = CompiledTemplate.load(TEMPLATE_PATH)
+
+    # Like timeit, keep the garbage collector out of the measurements
+    gc.collect()
+    gc.disable()
+
+    start = time.perf_counter()
+    expected = [json.loads(jinja_template.render(**values)) for values in old_values]
+    jinja_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered = [compiled.render(**values) for values in new_values]
+    compiled_seconds = time.perf_counter() - start
+
+    gc.enable()
+
+    assert rendered == expected, "Compiled template output differs from Jinja's"
+
+    print(f"{'entries':>8} {'jinja (s)':>12} {'compiled (s)':>12} {'speedup':>8}")
+    print(
+        f"{args.entries:>8} {jinja_seconds:12.3f} {compiled_seconds:12.3f} "
+        f"{jinja_seconds / compiled_seconds:7.1f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Time building Goodreads pages from feed entries in one process against a
+pool of processes, with and without the pages cached by an earlier run.
+
+Usage: python benchmarks/bench_page_payloads.py [--entries 5000] [--workers 1,2,4]
+"""
+
+import argparse
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import feedparser
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from notion_sync.goodreads import GoodreadsSource  # noqa: E402
+
+TEMPLATE_PATH = ROOT.joinpath("goodreads", "notion_page_book_template.json")
+
+
+def make_entry(n: int, rng: random.Random) -> feedparser.FeedParserDict:
+    paragraphs = [
+        " ".join(
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+            for _ in range(80)
+        )
+        for _ in range(rng.randint(1, 8))
+    ]
+    return feedparser.FeedParserDict(
+        title=f"Book {n}: A Subtitle (Series {n % 50}, #{n % 7})",
+        author_name=f"Author {n}",
+        book_description="".join(f"<p><b>{p}</b><br/></p>" for p in paragraphs),
+        book_id=str(n),
+        book_large_image_url=f"https://images.example.com/{n}.jpg",
+        user_shelves="fiction, owned, ebook, fantasy",
+        user_rating=str(n % 6),
+        user_date_added="Sat, 04 Mar 2023 10:15:00 -0800",
+        user_read_at="",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--workers", default="1,2,4")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    items = [(make_entry(n, rng), "read") for n in range(args.entries)]
+
+    expected = None
+    print(f"{'workers':>8} {'run':>5} {'seconds':>10} {'pages/s':>10}")
+    for workers in [int(n) for n in args.workers.split(",")]:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            # The first run builds every page, the second finds them all in
+            # the page cache left by the first
+            for run in ("cold", "warm"):
+                source = GoodreadsSource("0", "key", [], TEMPLATE_PATH, Path(cache_dir))
+                start = time.perf_counter()
+                payloads = list(source.page_payloads(items, workers=workers))
+                seconds = time.perf_counter() - start
+                source.pages.close()
+
+                expected = expected or payloads
+                assert payloads == expected, "Output differs between runs"
+                print(
+                    f"{workers:>8} {run:>5} {seconds:10.3f} "
+                    f"{len(items) / seconds:10.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Compare the key-indexed planner with the old DataFrame boolean-mask lookups.
+
+Usage: python benchmarks/bench_planner.py [--sizes 1000,5000,10000,50000]
+
+The mask-based approach is quadratic, so it is only run up to `--max-mask-rows`.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notion_sync.pagination import NotionPage  # noqa: E402
+from notion_sync.planner import build_plan  # noqa: E402
+
+
+def make_properties(title: str, n: int) -> dict:
+    return {
+        "Title": {"title": [{"text": {"content": title}}]},
+        "PR": {"type": "checkbox", "checkbox": n % 2 == 0},
+        "URL": {"type": "url", "url": f"https://github.com/org/repo/issues/{n}"},
+    }
+
+
+def make_data(size: int, seed: int = 42):
+    """Synthetic CSV rows and Notion pages which overlap by ~80%"""
+    rng = random.Random(seed)
+    rows = [
+        {"raw_title": f"Issue {n}", "properties": make_properties(f"Issue {n}", n)}
+        for n in range(size)
+    ]
+
+    pages = []
+    for n in range(size // 5, size + size // 5):
+        title = f"Issue {n}"
+        props = make_properties(title, n + (rng.random() < 0.1))
+        page = {"id": f"page-{n}", "properties": props, "archived": False}
+        pages.append(page)
+        if rng.random() < 0.01:
+            pages.append({**page, "id": f"page-{n}-dupe"})
+
+    return rows, pages
+
+
+def run_masks(rows: list[dict], pages: list[dict]) -> int:
+    """The original approach: set differences plus a column scan per title"""
+    csv_df = pd.DataFrame(rows)
+    notion_db = pd.DataFrame(
+        {
+            "page_id": [page["id"] for page in pages],
+            "title": [
+                page["properties"]["Title"]["title"][0]["text"]["content"]
+                for page in pages
+            ],
+        }
+    )
+    csv_set = set(csv_df["raw_title"].values)
+    notion_set = set(notion_db["title"].values)
+
+    ops = 0
+    for title in csv_set.intersection(notion_set):
+        page_id = notion_db["page_id"].loc[notion_db["title"] == title].values[0]
+        row = csv_df[csv_df["raw_title"] == title].iloc[0]
+        ops += bool(page_id) and bool(row["properties"])
+    for title in csv_set.difference(notion_set):
+        row = csv_df[csv_df["raw_title"] == title].iloc[0]
+        ops += bool(row["properties"])
+    for title in notion_set.difference(csv_set):
+        ops += len(notion_db[notion_db["title"] == title]["page_id"].values)
+    return ops
+
+
+def run_planner(rows: list[dict], pages: list[dict]) -> int:
+    source = {}
+    for row in rows:
+        key = row["properties"]["URL"]["url"]
+        source.setdefault(key, {"properties": row["properties"]})
+
+    plan = build_plan(
+        "database",
+        source,
+        (NotionPage.from_api(page, "URL") for page in pages),
+    )
+    return len(plan.create) + len(plan.update) + len(plan.archive) + plan.unchanged
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,5000,10000,50000")
+    parser.add_argument("--max-mask-rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'rows':>8} {'masks (s)':>12} {'planner (s)':>12}")
+    for size in [int(size) for size in args.sizes.split(",")]:
+        rows, pages = make_data(size)
+        masks = (
+            f"{timed(run_masks, rows, pages):12.3f}"
+            if size <= args.max_mask_rows
+            else f"{'skipped':>12}"
+        )
+        print(f"{size:>8} {masks} {timed(run_planner, rows, pages):12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Measure how long each sync script takes to import everything it needs.
+
+Usage: python benchmarks/bench_startup.py [--runs 5] [--top 10]
+
+Each script's modules are imported in a fresh interpreter with
+`python -X importtime`, the same as a cold CI run. The median total is
+reported per script, along with the slowest packages imported by the last run.
+Modules which are only imported once there is work to do (feedparser,
+html_to_markdown and rich.progress) aren't included.
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+SCRIPTS = {
+    "github-activity": ["notion_sync.cli", "notion_sync.github_activity"],
+    "goodreads": ["notion_sync.cli", "notion_sync.goodreads"],
+}
+
+# e.g. "import time:       426 |     107888 |       httpx"
+IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_times(modules: list[str]) -> list[tuple[str, int, int]]:
+    """Import `modules` in a new interpreter, returning each import's name, depth
+    and cumulative time in microseconds"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {', '.join(modules)}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME.match(line)
+        if match:
+            _, cumulative, indent, name = match.groups()
+            times.append((name, len(indent) // 2, int(cumulative)))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for script, modules in SCRIPTS.items():
+        totals = []
+        for _ in range(args.runs):
+            times = import_times(modules)
+            totals.append(sum(us for _, depth, us in times if depth == 0))
+        print(f"{script}: {statistics.median(totals) / 1000:.0f}ms to import")
+
+        # Packages, wherever they were first imported from
+        packages = sorted(
+            ((us, name) for name, _, us in times if "." not in name), reverse=True
+        )
+        for us, name in packages[: args.top]:
+            print(f"  {name:<40} {us / 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
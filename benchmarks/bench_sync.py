@@ -0,0 +1,193 @@
+"""Run whole syncs against a local fake Notion API and synthetic sources.
+
+Usage: python benchmarks/bench_sync.py [--source github|goodreads] [--items 2000]
+    [--latency 0.0] [--rate-limit 0.0] [--rate 1000] [--churn 0.1] [--workers 1]
+
+Four scenarios are run one after another against the same database:
+
+- cold: a full sync into an empty database
+- no-op: an incremental sync straight afterwards, with nothing changed
+- no-op (full): the same, but pulling and comparing every page
+- churn: an incremental sync after `--churn` of the items changed, and half as
+  many were replaced
+
+Nothing leaves the machine. `--rate` overrides Notion's limit of 3 requests
+per second so large runs finish quickly; pass `--rate 3` for realistic timings.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from rich.console import Console
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import synthetic  # noqa: E402
+from fake_notion import FakeNotion  # noqa: E402
+
+from notion_sync.engine import SyncEngine  # noqa: E402
+from notion_sync.github_activity import GitHubActivitySource  # noqa: E402
+from notion_sync.goodreads import GoodreadsSource  # noqa: E402
+from notion_sync.metrics import Metrics  # noqa: E402
+from notion_sync.sink import NotionSink  # noqa: E402
+from notion_sync.writer import TokenBucket  # noqa: E402
+
+TEMPLATE_PATH = ROOT.joinpath("goodreads", "notion_page_book_template.json")
+SHELVES = ["currently-reading", "read", "to-read"]
+WRITE_METHODS = {"POST", "PATCH", "DELETE"}
+
+
+class GitHubScenario:
+    def __init__(self, fake: FakeNotion, size: int, cache_dir: Path):
+        self.fake = fake
+        self.rows = synthetic.github_rows(size)
+        self.source = GitHubActivitySource(
+            cache_dir, data_url=fake.url + "/github-activity.csv"
+        )
+        self.publish()
+
+    def publish(self) -> None:
+        self.fake.files["/github-activity.csv"] = synthetic.github_csv(self.rows)
+
+    def churn(self, fraction: float) -> None:
+        self.rows = synthetic.churn_github_rows(self.rows, fraction)
+        self.publish()
+
+
+class GoodreadsScenario:
+    def __init__(self, fake: FakeNotion, size: int, cache_dir: Path):
+        self.fake = fake
+        self.entries = synthetic.goodreads_entries(size)
+        self.source = GoodreadsSource(
+            "0",
+            "key",
+            SHELVES,
+            TEMPLATE_PATH,
+            cache_dir,
+            rss_base_url=fake.url + "/rss/{user_id}?key={key}&shelf=",
+        )
+        self.publish()
+
+    def publish(self) -> None:
+        # Books stay on the same shelf as others are added and removed
+        for n, shelf in enumerate(SHELVES):
+            entries = [
+                entry
+                for entry in self.entries
+                if int(entry["book_id"]) % len(SHELVES) == n
+            ]
+            self.fake.files[f"/rss/0?key=key&shelf={shelf}"] = synthetic.goodreads_rss(
+                entries, shelf
+            )
+
+    def churn(self, fraction: float) -> None:
+        self.entries = synthetic.churn_goodreads_entries(self.entries, fraction)
+        self.publish()
+
+
+def run(name: str, scenario, args, state_path: Path, incremental: bool) -> dict:
+    fake = scenario.fake
+    metrics = Metrics(source=scenario.source.name)
+    console = Console(quiet=True)
+    # Reads and writes share the rate limit, as they do from the command line
+    sink = NotionSink(
+        "secret",
+        fake.database_id,
+        console,
+        fake.url,
+        metrics=metrics,
+        rate=args.rate,
+        bucket=TokenBucket(args.rate),
+    )
+    engine = SyncEngine(scenario.source, sink, state_path)
+
+    fake.reset_calls()
+    start = time.perf_counter()
+    ok = engine.run(incremental=incremental, show_progress=False, workers=args.workers)
+    seconds = time.perf_counter() - start
+    calls = fake.reset_calls()
+
+    writes = sum(
+        count
+        for endpoint, count in calls.items()
+        if endpoint.split()[0] in WRITE_METHODS and not endpoint.endswith("/query")
+    )
+    return {
+        "scenario": name,
+        "ok": ok,
+        "seconds": seconds,
+        "requests": sum(calls.values()),
+        "writes": writes,
+        "rate_limited": sum(metrics.rate_limited.values()),
+        "received": sum(stats.bytes_received for stats in metrics.endpoints.values()),
+        "calls": calls,
+        "phases": metrics.phases,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--source", choices=["github", "goodreads"], default="github")
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument(
+        "--rate-limit", type=float, default=0.0, help="Fraction of requests to 429"
+    )
+    parser.add_argument("--rate", type=float, default=1000)
+    parser.add_argument("--churn", type=float, default=0.1)
+    parser.add_argument(
+        "--extra-properties",
+        type=int,
+        default=5,
+        help="Properties on each page which the sync doesn't use",
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, FakeNotion(
+        latency=args.latency,
+        rate_limit=args.rate_limit,
+        extra_properties=args.extra_properties,
+    ) as fake:
+        cache_dir = Path(tmp)
+        state_path = cache_dir.joinpath("sync-state.json")
+        scenario_class = (
+            GitHubScenario if args.source == "github" else GoodreadsScenario
+        )
+        scenario = scenario_class(fake, args.items, cache_dir)
+
+        results = [
+            run("cold", scenario, args, state_path, incremental=False),
+            run("no-op", scenario, args, state_path, incremental=True),
+            run("no-op (full)", scenario, args, state_path, incremental=False),
+        ]
+        scenario.churn(args.churn)
+        results.append(run("churn", scenario, args, state_path, incremental=True))
+
+    print(
+        f"{'scenario':<14} {'seconds':>8} {'items/s':>9} {'writes':>7} "
+        f"{'writes/s':>9} {'requests':>9} {'429s':>5} {'KiB in':>8}"
+    )
+    for result in results:
+        seconds = result["seconds"]
+        print(
+            f"{result['scenario']:<14} {seconds:8.2f} {args.items / seconds:9.0f} "
+            f"{result['writes']:>7} {result['writes'] / seconds:9.1f} "
+            f"{result['requests']:>9} {result['rate_limited']:>5} "
+            f"{result['received'] / 1024:8.1f}" + ("" if result["ok"] else "  (failed)")
+        )
+
+    for result in results:
+        print(f"\n{result['scenario']}")
+        for phase, seconds in result["phases"].items():
+            print(f"  {phase:<40} {seconds:8.2f}s")
+        for endpoint, count in sorted(result["calls"].items()):
+            print(f"  {endpoint:<40} {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Compare syncing several tenants one after another with syncing them together.
+
+Usage: python benchmarks/bench_tenants.py [--tenants 1,2,4,8] [--items 200]
+    [--latency 0.05] [--rate 10] [--shared-token]
+
+Each tenant has its own synthetic GitHub activity source and its own database
+in a local fake Notion API. Tenants have their own token, and so their own
+rate limit, unless `--shared-token` is passed. For each number of tenants, a
+cold sync of every tenant is timed with a concurrency of one and with one
+thread per tenant.
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from rich.console import Console
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bench_sync import GitHubScenario  # noqa: E402
+from fake_notion import FakeNotion  # noqa: E402
+
+from notion_sync.tenants import Tenant, run_tenants  # noqa: E402
+
+
+def run(n: int, concurrency: int, args) -> tuple[float, int]:
+    """Sync `n` fresh tenants, returning the time taken and how many failed"""
+    with tempfile.TemporaryDirectory() as tmp:
+        fakes = [FakeNotion(latency=args.latency, seed=i) for i in range(n)]
+        tenants = []
+        for i, fake in enumerate(fakes):
+            fake.__enter__()
+            cache_dir = Path(tmp, f"tenant-{i}")
+            scenario = GitHubScenario(fake, args.items, cache_dir)
+            tenants.append(
+                Tenant(
+                    name=f"tenant-{i}",
+                    source=scenario.source,
+                    token="secret" if args.shared_token else f"secret-{i}",
+                    database_id=fake.database_id,
+                    cache_dir=cache_dir,
+                    base_url=fake.url,
+                )
+            )
+
+        try:
+            start = time.perf_counter()
+            results = run_tenants(
+                tenants,
+                concurrency=concurrency,
+                rate=args.rate,
+                console=Console(quiet=True),
+            )
+            seconds = time.perf_counter() - start
+        finally:
+            for fake in fakes:
+                fake.__exit__(None, None, None)
+
+    return seconds, sum(not result.ok for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tenants", default="1,2,4,8")
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--rate", type=float, default=10)
+    parser.add_argument("--shared-token", action="store_true")
+    args = parser.parse_args()
+
+    print(f"{'tenants':>8} {'serial (s)':>11} {'concurrent (s)':>15} {'speedup':>8}")
+    for n in [int(n) for n in args.tenants.split(",")]:
+        serial, serial_failed = run(n, 1, args)
+        concurrent, concurrent_failed = run(n, n, args)
+        failed = serial_failed + concurrent_failed
+        print(
+            f"{n:>8} {serial:11.2f} {concurrent:15.2f} {serial / concurrent:7.1f}x"
+            + (f"  ({failed} failed)" if failed else "")
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+"""A local stand-in for the parts of the Notion API the syncs use.
+
+Pages and blocks are kept in memory. Requests can be slowed down with a fixed
+latency, and a fraction of them answered with a 429 to exercise the writer's
+retries. Every request is counted by endpoint. The server can also serve
+static files, like a synthetic github-activity.csv or Goodreads RSS feeds,
+with ETag support.
+
+    with FakeNotion(latency=0.05) as fake:
+        NotionSink("token", fake.database_id, base_url=fake.url)
+"""
+
+import hashlib
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from notion_sync.hashing import PROPERTY_TYPES  # noqa: E402
+from notion_sync.metrics import endpoint_label  # noqa: E402
+
+DEFAULT_PAGE_SIZE = 100
+
+
+def timestamp() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+
+
+def to_read_format(properties: dict[str, dict]) -> dict[str, dict]:
+    """Give written property values the shape Notion returns them in"""
+    result = {}
+    for name, prop in properties.items():
+        prop_type = prop.get("type")
+        if prop_type not in PROPERTY_TYPES:
+            prop_type = next((key for key in PROPERTY_TYPES if key in prop), None)
+        value = prop.get(prop_type)
+        if prop_type in ("title", "rich_text"):
+            value = [
+                {**item, "plain_text": item.get("text", {}).get("content", "")}
+                for item in value or []
+            ]
+        result[name] = {"id": name, "type": prop_type, prop_type: value}
+    return result
+
+
+def to_block(block: dict[str, Any]) -> dict[str, Any]:
+    block_type = block["type"]
+    value = dict(block.get(block_type) or {})
+    if "rich_text" in value:
+        value["rich_text"] = [
+            {**item, "plain_text": item.get("text", {}).get("content", "")}
+            for item in value["rich_text"]
+        ]
+    return {
+        "object": "block",
+        "id": str(uuid.uuid4()),
+        "type": block_type,
+        block_type: value,
+        "has_children": False,
+    }
+
+
+def error(status: int, code: str, message: str) -> tuple[int, dict[str, Any]]:
+    return status, {
+        "object": "error",
+        "status": status,
+        "code": code,
+        "message": message,
+    }
+
+
+def matches(page: dict[str, Any], query_filter: dict[str, Any] | None) -> bool:
+    """Evaluate the filters the syncs send. Property filters aren't modelled"""
+    if not query_filter:
+        return True
+    if "and" in query_filter:
+        return all(matches(page, f) for f in query_filter["and"])
+    if "or" in query_filter:
+        return any(matches(page, f) for f in query_filter["or"])
+    if query_filter.get("timestamp") == "last_edited_time":
+        condition = query_filter["last_edited_time"]
+        edited = datetime.fromisoformat(page["last_edited_time"])
+        if "on_or_after" in condition:
+            return edited >= datetime.fromisoformat(condition["on_or_after"])
+        if "after" in condition:
+            return edited > datetime.fromisoformat(condition["after"])
+    return True
+
+
+class FakeNotion:
+    """A threaded HTTP server holding a single Notion database"""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        rate_limit: float = 0.0,
+        extra_properties: int = 0,
+        retry_after: float = 0.1,
+        seed: int = 42,
+    ):
+        self.latency = latency
+        self.rate_limit = rate_limit
+        # Properties which the syncs don't write, like notes added by hand
+        self.extra_properties = to_read_format(
+            {
+                f"Notes {n}": {"rich_text": [{"text": {"content": "A note " * 20}}]}
+                for n in range(extra_properties)
+            }
+        )
+        self.retry_after = retry_after
+        self.database_id = uuid.UUID(int=seed).hex
+        self.pages: dict[str, dict[str, Any]] = {}
+        self.blocks: dict[str, list[dict[str, Any]]] = {}
+        # The ID of the page each block belongs to
+        self.block_parents: dict[str, str] = {}
+        self.files: dict[str, bytes] = {}
+        self.calls: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def __enter__(self) -> "FakeNotion":
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def reset_calls(self) -> Counter:
+        """Return the request counts so far, and start counting again"""
+        with self._lock:
+            calls, self.calls = self.calls, Counter()
+        return calls
+
+    def live_pages(self) -> list[dict[str, Any]]:
+        return [page for page in self.pages.values() if not page["archived"]]
+
+    # Endpoints, each returning a status code and a JSON body
+
+    def retrieve_database(self, database_id: str):
+        # The schema grows as properties are written, so it only holds
+        # properties some page has
+        schema = {}
+        for page in self.pages.values():
+            for name, prop in page["properties"].items():
+                schema.setdefault(name, {"id": prop["id"], "type": prop["type"]})
+        return 200, {"object": "database", "id": database_id, "properties": schema}
+
+    def query(self, database_id: str, body: dict[str, Any], params):
+        pages = [
+            page for page in self.live_pages() if matches(page, body.get("filter"))
+        ]
+        start = int(body.get("start_cursor") or 0)
+        end = start + min(body.get("page_size", DEFAULT_PAGE_SIZE), DEFAULT_PAGE_SIZE)
+        has_more = end < len(pages)
+
+        results = pages[start:end]
+        if "filter_properties" in params:
+            ids = set(params["filter_properties"])
+            results = [
+                {
+                    **page,
+                    "properties": {
+                        name: prop
+                        for name, prop in page["properties"].items()
+                        if prop["id"] in ids
+                    },
+                }
+                for page in results
+            ]
+
+        return 200, {
+            "object": "list",
+            "results": results,
+            "has_more": has_more,
+            "next_cursor": str(end) if has_more else None,
+        }
+
+    def create_page(self, body: dict[str, Any]):
+        page_id = str(uuid.uuid4())
+        now = timestamp()
+        page = {
+            "object": "page",
+            "id": page_id,
+            "created_time": now,
+            "last_edited_time": now,
+            "archived": False,
+            "icon": body.get("icon"),
+            "parent": body["parent"],
+            "properties": {
+                **self.extra_properties,
+                **to_read_format(body.get("properties", {})),
+            },
+        }
+        self.pages[page_id] = page
+        self.blocks[page_id] = []
+        self.append_children(page_id, {"children": body.get("children", [])})
+        return 200, page
+
+    def update_page(self, page_id: str, body: dict[str, Any]):
+        page = self.pages.get(page_id)
+        if page is None:
+            return error(404, "object_not_found", f"No page {page_id}")
+        page["properties"].update(to_read_format(body.get("properties", {})))
+        if "archived" in body:
+            page["archived"] = body["archived"]
+        page["last_edited_time"] = timestamp()
+        return 200, page
+
+    def list_children(self, block_id: str, params: dict[str, list[str]]):
+        children = self.blocks.get(block_id, [])
+        start = int(params.get("start_cursor", [0])[0])
+        end = start + min(
+            int(params.get("page_size", [DEFAULT_PAGE_SIZE])[0]), DEFAULT_PAGE_SIZE
+        )
+        has_more = end < len(children)
+        return 200, {
+            "object": "list",
+            "results": children[start:end],
+            "has_more": has_more,
+            "next_cursor": str(end) if has_more else None,
+        }
+
+    def append_children(self, block_id: str, body: dict[str, Any]):
+        new = [to_block(block) for block in body["children"]]
+        children = self.blocks.setdefault(block_id, [])
+        if body.get("after"):
+            ids = [block["id"] for block in children]
+            if body["after"] not in ids:
+                return error(400, "validation_error", f"No block {body['after']}")
+            position = ids.index(body["after"]) + 1
+            children[position:position] = new
+        else:
+            children.extend(new)
+        for block in new:
+            self.block_parents[block["id"]] = block_id
+        return 200, {"object": "list", "results": new, "has_more": False}
+
+    def delete_block(self, block_id: str):
+        parent_id = self.block_parents.pop(block_id, None)
+        if parent_id is None:
+            return error(404, "object_not_found", f"No block {block_id}")
+        children = self.blocks[parent_id]
+        block = next(block for block in children if block["id"] == block_id)
+        children.remove(block)
+        return 200, {**block, "archived": True}
+
+    def route(self, method: str, parts: list[str], params, body):
+        match method, parts:
+            case "GET", ["databases", database_id]:
+                return self.retrieve_database(database_id)
+            case "POST", ["databases", database_id, "query"]:
+                return self.query(database_id, body, params)
+            case "POST", ["pages"]:
+                return self.create_page(body)
+            case "PATCH", ["pages", page_id]:
+                return self.update_page(page_id, body)
+            case "GET", ["blocks", block_id, "children"]:
+                return self.list_children(block_id, params)
+            case "PATCH", ["blocks", block_id, "children"]:
+                return self.append_children(block_id, body)
+            case "DELETE", ["blocks", block_id]:
+                return self.delete_block(block_id)
+        return error(404, "invalid_request_url", f"{method} /{'/'.join(parts)}")
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep connections alive, like the real API
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def send(self, status: int, body: bytes, headers: dict[str, str]) -> None:
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def serve_file(self) -> None:
+                data = fake.files.get(self.path)
+                if data is None:
+                    data = fake.files.get(self.path.split("?")[0])
+                if data is None:
+                    self.send(404, b"", {})
+                    return
+                etag = '"' + hashlib.sha256(data).hexdigest()[:16] + '"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send(304, b"", {"ETag": etag})
+                else:
+                    self.send(200, data, {"ETag": etag})
+
+            def handle_api(self) -> None:
+                time.sleep(fake.latency)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                path, _, query = self.path.partition("?")
+                params = parse_qs(query)
+
+                with fake._lock:
+                    fake.calls[endpoint_label(self.command, fake.url + path)] += 1
+                    if fake._rng.random() < fake.rate_limit:
+                        status, response = error(429, "rate_limited", "Rate limited")
+                        headers = {"Retry-After": str(fake.retry_after)}
+                    else:
+                        parts = path.strip("/").split("/")[1:]
+                        status, response = fake.route(self.command, parts, params, body)
+                        headers = {}
+
+                headers["Content-Type"] = "application/json"
+                self.send(status, json.dumps(response).encode(), headers)
+
+            def dispatch(self) -> None:
+                if self.path.startswith("/v1/"):
+                    self.handle_api()
+                else:
+                    with fake._lock:
+                        fake.calls[f"{self.command} files"] += 1
+                    self.serve_file()
+
+            do_GET = do_POST = do_PATCH = do_DELETE = dispatch
+
+        return Handler
@@ -0,0 +1,170 @@
+"""Generate synthetic sources of any size for the benchmarks.
+
+Rows of github-activity.csv and Goodreads RSS entries are generated from a
+seed, so a scenario is the same every time it is run. `churn_*` functions
+change, remove and add a fraction of the items, like a busy week would.
+"""
+
+import csv
+import io
+import random
+import string
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+# github-activity.csv has more columns than the sync reads
+GITHUB_COLUMNS = [
+    "number",
+    "raw_title",
+    "title",
+    "filter",
+    "state",
+    "pull_request",
+    "repo_name",
+    "repo_url",
+    "link",
+    "created_at",
+    "updated_at",
+    "closed_at",
+]
+FILTERS = ["assigned", "review_requested", "mentioned", "created"]
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def words(rng: random.Random, n: int) -> str:
+    return " ".join(
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+        for _ in range(n)
+    )
+
+
+def github_row(n: int, rng: random.Random) -> dict[str, str]:
+    repo = f"org-{n % 17}/repo-{n % 101}"
+    kind = "pull" if n % 3 == 0 else "issues"
+    created = START + timedelta(hours=n)
+    return {
+        "number": str(n),
+        "raw_title": f"{words(rng, 5).capitalize()} #{n}",
+        "title": f"[{repo}] #{n}",
+        "filter": ":".join(rng.sample(FILTERS, rng.randint(1, 2))),
+        # Most items are open so most rows are synced
+        "state": "open" if rng.random() < 0.9 else "closed",
+        "pull_request": "True" if kind == "pull" else "",
+        "repo_name": repo,
+        "repo_url": f"https://github.com/{repo}",
+        "link": f"https://github.com/{repo}/{kind}/{n}",
+        "created_at": created.isoformat(),
+        "updated_at": (created + timedelta(days=rng.randint(0, 30))).isoformat(),
+        "closed_at": "",
+    }
+
+
+def github_rows(size: int, seed: int = 42) -> list[dict[str, str]]:
+    rng = random.Random(seed)
+    return [github_row(n, rng) for n in range(size)]
+
+
+def churn_github_rows(
+    rows: list[dict[str, str]], fraction: float, seed: int = 43
+) -> list[dict[str, str]]:
+    """Update `fraction` of the rows, and replace half as many with new ones.
+
+    A third of the updated rows are renamed.
+    """
+    rng = random.Random(seed)
+    rows = [dict(row) for row in rows]
+    for n, row in enumerate(rng.sample(rows, int(len(rows) * fraction))):
+        if n % 3 == 0:
+            row["raw_title"] = f"{row['raw_title']} (renamed)"
+        row["filter"] = ":".join(rng.sample(FILTERS, rng.randint(1, 2)))
+        row["updated_at"] = (
+            datetime.fromisoformat(row["updated_at"]) + timedelta(days=1)
+        ).isoformat()
+
+    replaced = int(len(rows) * fraction / 2)
+    for _ in range(replaced):
+        rows.pop(rng.randrange(len(rows)))
+    first = max(int(row["number"]) for row in rows) + 1
+    rows.extend(github_row(n, rng) for n in range(first, first + replaced))
+    return rows
+
+
+def github_csv(rows: list[dict[str, str]]) -> bytes:
+    f = io.StringIO()
+    writer = csv.DictWriter(f, fieldnames=GITHUB_COLUMNS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return f.getvalue().encode()
+
+
+def goodreads_entry(n: int, rng: random.Random) -> dict[str, str]:
+    title = f"{words(rng, 3).title()} {n}"
+    if rng.random() < 0.3:
+        title += f": {words(rng, 4).capitalize()}"
+    if rng.random() < 0.4:
+        title += f" ({words(rng, 2).title()}, #{rng.randint(1, 9)})"
+    paragraphs = [words(rng, rng.randint(20, 120)) for _ in range(rng.randint(1, 6))]
+    tags = ["fiction" if rng.random() < 0.7 else "non-fiction"]
+    tags += rng.sample(["owned", "ebook", "audiobook", "fantasy", "history"], 2)
+    return {
+        "book_id": str(100_000 + n),
+        "title": title,
+        "author_name": words(rng, 2).title(),
+        "book_description": "".join(f"<p>{p}<br /></p>" for p in paragraphs),
+        "book_large_image_url": f"https://images.example.com/{n}.jpg",
+        "user_shelves": ", ".join(tags),
+        "user_rating": str(rng.randint(0, 5)),
+        "user_date_added": (START + timedelta(days=n % 900)).strftime(
+            "%a, %d %b %Y %H:%M:%S %z"
+        ),
+        "user_read_at": "",
+    }
+
+
+def goodreads_entries(size: int, seed: int = 42) -> list[dict[str, str]]:
+    rng = random.Random(seed)
+    return [goodreads_entry(n, rng) for n in range(size)]
+
+
+def churn_goodreads_entries(
+    entries: list[dict[str, str]], fraction: float, seed: int = 43
+) -> list[dict[str, str]]:
+    """Re-rate `fraction` of the books, and replace half as many with new ones.
+
+    A third of the re-rated books are renamed.
+    """
+    rng = random.Random(seed)
+    entries = [dict(entry) for entry in entries]
+    for n, entry in enumerate(rng.sample(entries, int(len(entries) * fraction))):
+        if n % 3 == 0:
+            entry["title"] = f"Revised {entry['title']}"
+        entry["user_rating"] = str((int(entry["user_rating"]) + 1) % 6)
+
+    replaced = int(len(entries) * fraction / 2)
+    for _ in range(replaced):
+        entries.pop(rng.randrange(len(entries)))
+    first = max(int(entry["book_id"]) for entry in entries) - 100_000 + 1
+    entries.extend(goodreads_entry(n, rng) for n in range(first, first + replaced))
+    return entries
+
+
+def goodreads_rss(entries: list[dict[str, str]], shelf: str) -> bytes:
+    """Render entries as a Goodreads shelf RSS feed"""
+    items = []
+    for entry in entries:
+        fields = "".join(
+            f"<{key}>{escape(value)}</{key}>"
+            for key, value in entry.items()
+            if key != "book_description"
+        )
+        description = escape(entry["book_description"])
+        items.append(
+            f"<item><guid>{entry['book_id']}</guid>{fields}"
+            f"<book_description>{description}</book_description></item>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<rss version="2.0"><channel><title>{shelf}</title>'
+        + "".join(items)
+        + "</channel></rss>"
+    ).encode()
@@ -1,400 +1,35 @@
-import json
-import os
-import re
-from datetime import datetime
+import sys
 from pathlib import Path
 
-import feedparser
-import jinja2
-import pandas as pd
-from html_to_markdown import convert
-from notion_client import Client
-from rich.console import Console
-from rich.progress import track
+# Make the shared `notion_sync` package in the root of the repo importable
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-console = Console(force_terminal=True)
+from notion_sync.cli import main  # noqa: E402
+from notion_sync.goodreads import GoodreadsSource  # noqa: E402
 
 # Get the path to the folder this script is in
 PATH = Path(__file__).parent
 
-# Read in the template JSON file with jinja
-with open(PATH.joinpath("notion_page_book_template.json")) as f:
-    template = jinja2.Template(f.read())
+# Where the feed cache and the checkpoint used by incremental syncs are kept
+CACHE_PATH = PATH.joinpath(".cache")
+
+# The Goodreads user whose shelves are synced
+GOODREADS_USER_ID = "122919504"
 
 # Read in Goodreads shelves to query
 with open(PATH.joinpath("shelves.txt")) as f:
     shelves = [line.strip("\n") for line in f.readlines()]
 
-
-def get_subtitle(title: str) -> str:
-    """Extract a subtitle from a book's title"""
-    return title.split(":")[1].strip()
-
-
-def get_series_info(title: str) -> tuple[str, str, str]:
-    """Extract book series info from a title string."""
-    patterns = [
-        r".+ \(((.+?),? #(\d+))\)",  # Single entry (e.g., #3)
-        r".+ \(((.+?),? #(\d+[-\.]\d+))\)",  # Omnibus or novella (e.g., #1-3, #0.1)
-        r".+ \(((.+?),? #(\d+\.\d+-\d+))\)",  # Omnibus with novella (e.g., #0.1-4)
-    ]
-
-    for pattern in patterns:
-        match = re.fullmatch(pattern, title)
-        if match:
-            series = f"({match.group(1).strip()})"
-            series_name = match.group(2).strip()
-            series_num = match.group(3).strip()
-            return series, series_name, series_num
-
-    # No match found
-    return "", "", ""
-
-
-def get_clean_book_info(book_title: str) -> tuple[str, str, str, str]:
-    """Extract title, subtitle, and series"""
-    if ("(" in book_title) and ("#" in book_title):
-        series, series_name, series_num = get_series_info(book_title)
-        book_title = book_title.replace(series, "")
-    else:
-        series = series_name = series_num = ""
-
-    if ":" in book_title:
-        subtitle = get_subtitle(book_title)
-        book_title = book_title.replace(subtitle, "")
-    else:
-        subtitle = ""
-
-    book_title = book_title.replace(":", "").replace('"', "'")
-    return book_title.strip(), subtitle, series_name, series_num
-
-
-def create_page_metadata(entry, shelf):
-    # We have shelves that are `read-2` or `to-read-3` and we want to remove the
-    # numbering
-    if shelf.startswith("read-"):
-        shelf = "read"
-    elif shelf.startswith("to-read-"):
-        shelf = "to-read"
-
-    title, subtitle, series, series_num = get_clean_book_info(entry.title)
-    book_description = (
-        convert(entry.book_description)["content"].replace("\n", "").replace('"', "'")
-    )
-
-    # Create a mapping of template variables for jinja template
-    metadata_vars = {
-        "author_name": entry.author_name,
-        "book_description": book_description[:2000],
-        "book_id": entry.book_id,
-        "book_title": title,
-        "cover_url": entry.book_large_image_url,
-        "series": series,
-        "shelf": shelf,
-        "series_num": series_num,
-        "subtitle": subtitle,
-    }
-    page_metadata = template.render(**metadata_vars)
-
-    try:
-        # Try to parse the metadata into a dictionary
-        page_metadata = json.loads(page_metadata)
-
-    except json.decoder.JSONDecodeError as err:
-        # Create the errors folder if it doesn't exist
-        if not os.path.exists(PATH.joinpath("errors")):
-            os.mkdir(PATH.joinpath("errors"))
-
-        # Create a file to save the faulty json to
-        fn = re.sub(r"[^\w]", "_", title) + ".json"
-        with open(PATH.joinpath("errors", fn), "w") as f:
-            f.write(page_metadata)
-
-        raise err
-
-    # Add extra variables to the template that require more complex logic
-    page_metadata["properties"]["Fiction?"]["checkbox"] = (
-        "non-fiction" not in entry.user_shelves
-    )
-    page_metadata["properties"]["Rating"]["number"] = (
-        int(entry.user_rating) if int(entry.user_rating) > 0 else None
-    )
-    page_metadata["properties"]["Owned?"]["checkbox"] = "owned" in entry.user_shelves
-    page_metadata["properties"]["Would re-read?"]["checkbox"] = (
-        "re-read" in entry.user_shelves
-    )
-
-    formats = [
-        tag for tag in entry.user_shelves.split(", ") if tag.startswith("format")
-    ]
-    formats = [":".join(tag.split("-")[1:]) for tag in formats]
-    for tag in formats:
-        page_metadata["properties"]["Format"]["multi_select"].append({"name": tag})
-
-    topics = [tag for tag in entry.user_shelves.split(", ") if tag.startswith("topic")]
-    topics = ["-".join(tag.split("-")[1:]) for tag in topics]
-    for tag in topics:
-        page_metadata["properties"]["Topics"]["multi_select"].append(
-            {"name": tag, "color": "default"}
-        )
-
-    if shelf == "currently-reading":
-        try:
-            date_started = datetime.strptime(
-                entry.user_date_added, "%a, %d %b %Y %H:%M:%S %z"
-            )
-            page_metadata["properties"]["Date last started"] = {
-                "date": {"start": date_started.strftime("%Y-%m-%d")}
-            }
-        except ValueError:
-            print(
-                f"Could not parse started date for {entry.title}: {entry.user_date_added}"
-            )
-    elif shelf.startswith("read"):
-        try:
-            date_read_at = datetime.strptime(
-                entry.user_date_added, "%a, %d %b %Y %H:%M:%S %z"
-            )
-            page_metadata["properties"]["Date last read"] = {
-                "date": {"start": date_read_at.strftime("%Y-%m-%d")}
-            }
-        except ValueError:
-            print(
-                f"Could not parse completed date for {entry.title}: {entry.user_read_at}"
-            )
-
-    # If the book description is longer than 2000 characters, the upload to
-    # Notion will fail. So we chunk up the description into multiple objects
-    # of length 2000 characters.
-    if len(book_description) > 2000:
-        i_total = len(book_description) // 2000
-        for i in range(1, i_total + 1):
-            next_block = book_description[2000 * i: 2000 * (i + 1)]
-            page_metadata["children"].append(
-                {
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [
-                            {
-                                "type": "text",
-                                "text": {"content": next_block, "link": None},
-                            }
-                        ],
-                        "color": "default",
-                    },
-                }
-            )
-
-    return page_metadata
-
-
-CI = os.getenv("CI", False)
-if not CI:
-    from dotenv import load_dotenv
-
-    # Load in .env file
-    load_dotenv()
-
-GOODREADS_RSS_KEY = os.getenv("GOODREADS_RSS_KEY")
-NOTION_DATABASE_ID = os.getenv("NOTION_DATABASE_ID")
-NOTION_TOKEN = os.getenv("NOTION_TOKEN")
-
-# Construct RSS base URL
-rss_base_url = f"https://www.goodreads.com/review/list_rss/122919504?key={GOODREADS_RSS_KEY}&shelf="
-
-# Authenticate the notion client
-notion = Client(auth=NOTION_TOKEN)
-
-# Retrieve all the books in the Goodreads RSS feeds for each shelf
-goodreads_books = []
-for shelf in shelves:
-    feed = feedparser.parse(rss_base_url + shelf)
-
-    for entry in feed.entries:
-        try:
-            page_metadata = create_page_metadata(entry, shelf)
-
-            goodreads_books.append(
-                {
-                    "title": page_metadata["properties"]["Title"]["title"][0]["text"][
-                        "content"
-                    ],
-                    "page_metadata": page_metadata,
-                }
-            )
-        except json.decoder.JSONDecodeError as err:
-            console.print(f"[red]Skipping {entry.title}")
-            console.print(err)
-            continue
-
-# Convert into a dataframe
-goodreads_books = pd.DataFrame(goodreads_books)
-goodreads_books_title_set = set(goodreads_books["title"].values)
-
-# First iteration - querying the notion database for pages, return all pages
-resp = notion.databases.query(NOTION_DATABASE_ID)
-results = resp.get("results")
-
-notion_pages = []
-for page in results:
-    notion_pages.append(
-        {
-            "page_id": page["id"],
-            "title": page["properties"]["Title"]["title"][0]["plain_text"],
-            "archived": page["archived"],
-        }
+if __name__ == "__main__":
+    main(
+        lambda env: GoodreadsSource(
+            user_id=GOODREADS_USER_ID,
+            rss_key=env["GOODREADS_RSS_KEY"],
+            shelves=shelves,
+            template_path=PATH.joinpath("notion_page_book_template.json"),
+            cache_dir=CACHE_PATH,
+        ),
+        cache_dir=CACHE_PATH,
+        description="Sync Goodreads shelves to Notion",
+        required_env=("GOODREADS_RSS_KEY",),
     )
-
-# Pagination!
-# has_more variable is boolean, is True if there are more pages to process
-# next_cursor variable contains the postion to pick-up querying from, it is only
-# present if has_more is True
-while resp["has_more"]:
-    resp = notion.databases.query(NOTION_DATABASE_ID, start_cursor=resp["next_cursor"])
-    results = resp.get("results")
-
-    for page in results:
-        notion_pages.append(
-            {
-                "page_id": page["id"],
-                "title": page["properties"]["Title"]["title"][0]["plain_text"],
-                "archived": page["archived"],
-            }
-        )
-
-# Convert into a dataframe
-notion_pages = pd.DataFrame(notion_pages)
-notion_pages["archived"] = notion_pages["archived"].astype(bool)
-notion_pages_title_set = set(notion_pages["title"].values)
-
-# Intersection - Titles which are in BOTH Goodreads RSS feed and Notion DB
-to_be_updated = goodreads_books_title_set.intersection(notion_pages_title_set)
-console.print("[green]Number of pages to be updated:", len(to_be_updated))
-
-# Difference - Titles which ARE in the Goodreads RSS feed but ARE NOT in the
-# Notion DB
-to_be_created = goodreads_books_title_set.difference(notion_pages_title_set)
-console.print("[green]Number of pages to be created:", len(to_be_created))
-
-# Difference - Titles which ARE in the Notion DB but ARE NOT in the Goodreads RSS feed
-to_be_archived = notion_pages_title_set.difference(goodreads_books_title_set)
-console.print("[green]Number of pages to be archived:", len(to_be_archived))
-
-if CI:
-    if len(to_be_created) > 0:
-        console.print("[green]Creating new pages...")
-        for i, title in enumerate(to_be_created):
-            # Find the corresponding row in the Goodreads df
-            row = goodreads_books[goodreads_books["title"] == title].iloc[0]
-
-            notion.pages.create(
-                parent={"database_id": NOTION_DATABASE_ID},
-                icon=row["page_metadata"]["icon"],
-                properties=row["page_metadata"]["properties"],
-                children=row["page_metadata"]["children"],
-            )
-
-            console.print(f"[blue]Pages created: {i+1}/{len(to_be_created)}")
-
-    if len(to_be_updated) > 0:
-        console.print("[green]Updating existing pages...")
-        extra_pages_to_archive = []
-        for i, title in enumerate(to_be_updated):
-            # Find the page ID
-            page_id = notion_pages["page_id"].loc[notion_pages["title"] == title]
-
-            if len(page_id) > 1:
-                # Append extra IDs to list to archive later
-                extra_pages_to_archive.extend(page_id[1:])
-
-            page_id = page_id.values[0]
-
-            # Find the corresponding row in the Goodreads df
-            row = goodreads_books[goodreads_books["title"] == title].iloc[0]
-
-            # Update the page
-            notion.pages.update(
-                page_id,
-                properties=row["page_metadata"]["properties"],
-                children=row["page_metadata"]["children"],
-            )
-
-            console.print(f"[blue]Pages updated: {i+1}/{len(to_be_updated)}")
-
-    if len(to_be_archived) > 0:
-        console.print("[green]Archiving old pages...")
-        for i, title in enumerate(to_be_archived):
-            # Find the pages IDs - could be multiple
-            page_ids = notion_pages[notion_pages["title"] == title]["page_id"].values
-
-            for page_id in page_ids:
-                # Archive the page
-                notion.pages.update(page_id, archived=True)
-
-            console.print(f"[blue]Old pages archived: {i+1}/{len(to_be_archived)}")
-
-    if len(extra_pages_to_archive) > 0:
-        console.print("[green]Archiving duplicated pages...")
-        for i, page_id in enumerate(extra_pages_to_archive):
-            notion.pages.update(page_id, archived=True)
-
-        console.print(
-            f"[blue]Duplicate pages archived: {i+1}/{len(extra_pages_to_archive)}"
-        )
-
-    console.print("[green]Sync complete!")
-
-else:
-    if len(to_be_created) > 0:
-        console.print("[green]Creating new pages...")
-        for title in track(to_be_created):
-            # Find the corresponding row in the Goodreads df
-            row = goodreads_books[goodreads_books["title"] == title].iloc[0]
-
-            notion.pages.create(
-                parent={"database_id": NOTION_DATABASE_ID},
-                icon=row["page_metadata"]["icon"],
-                properties=row["page_metadata"]["properties"],
-                children=row["page_metadata"]["children"],
-            )
-
-    if len(to_be_updated) > 0:
-        console.print("[green]Updating existing pages...")
-        extra_pages_to_archive = []
-        for title in track(to_be_updated):
-            # Find the page ID
-            page_id = notion_pages["page_id"].loc[notion_pages["title"] == title]
-
-            if len(page_id) > 1:
-                # Append extra IDs to list to archive later
-                extra_pages_to_archive.extend(page_id[1:])
-
-            page_id = page_id.values[0]
-
-            # Find the corresponding row in the Goodreads df
-            row = goodreads_books[goodreads_books["title"] == title].iloc[0]
-
-            # Update the page
-            notion.pages.update(
-                page_id,
-                properties=row["page_metadata"]["properties"],
-                children=row["page_metadata"]["children"],
-            )
-
-    if len(to_be_archived) > 0:
-        console.print("[green]Archiving old pages...")
-        for title in track(to_be_archived):
-            # Find the pages IDs - could be multiple
-            page_ids = notion_pages[notion_pages["title"] == title]["page_id"].values
-
-            for page_id in page_ids:
-                # Archive the page
-                notion.pages.update(page_id, archived=True)
-
-    if len(extra_pages_to_archive) > 0:
-        console.print("[green]Archiving duplicated pages...")
-        for page_id in track(extra_pages_to_archive):
-            notion.pages.update(page_id, archived=True)
-
-    console.print("[green]Sync complete!")
@@ -0,0 +1 @@
+"""Shared building blocks for the scripts that sync various sources to Notion"""
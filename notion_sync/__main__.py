@@ -0,0 +1,4 @@
+from notion_sync.tenants import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import hashlib
+import json
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from notion_sync.writer import NotionWriter, PhaseStats
+
+# Notion accepts at most 100 blocks in a single request
+# https://developers.notion.com/reference/request-limits#limits-for-property-values
+MAX_BLOCKS_PER_REQUEST = 100
+
+
+def normalise_block(block: dict[str, Any]) -> tuple:
+    """Reduce a block to its type, text and any image URL.
+
+    Works for both the blocks returned when listing a page's children and the
+    blocks we send when creating a page.
+    """
+    block_type = block["type"]
+    value = block.get(block_type) or {}
+    text = "".join(
+        item.get("plain_text", item.get("text", {}).get("content", ""))
+        for item in value.get("rich_text", [])
+    )
+    url = (value.get("external") or value.get("file") or {}).get("url")
+    return block_type, text, url
+
+
+def body_hash(blocks: list[dict[str, Any]]) -> str:
+    """Create a stable hash of the content of a list of blocks"""
+    data = json.dumps([normalise_block(block) for block in blocks], ensure_ascii=False)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def chunks(items: list, size: int = MAX_BLOCKS_PER_REQUEST):
+    for start in range(0, len(items), size):
+        end = start + size
+        yield items[start:end]
+
+
+def layout_length(existing: list[dict[str, Any]], desired: list[dict[str, Any]]) -> int:
+    """Count the blocks at the top of a page that follow the layout of `desired`.
+
+    Each block must have the type of the block in the same place in `desired`,
+    and any more blocks the type of its last one, so a description that was
+    split into more paragraphs last time is still counted.
+
+    >>> def block(block_type):
+    ...     return {"type": block_type}
+    >>> layout = [block("image"), block("heading_2"), block("paragraph")]
+    >>> page = layout + [block("paragraph"), block("heading_3"), block("paragraph")]
+    >>> layout_length(page, layout)
+    4
+    """
+    if not desired:
+        return 0
+    count = 0
+    for index, block in enumerate(existing):
+        expected = desired[min(index, len(desired) - 1)]
+        if block["type"] != expected["type"]:
+            break
+        count += 1
+    return count
+
+
+def diff_blocks(
+    existing: list[dict[str, Any]],
+    desired: list[dict[str, Any]],
+    managed: int | None = None,
+) -> tuple[list[str], str | None, list[dict[str, Any]]]:
+    """Work out the fewest deletes and inserts to make the blocks the sync wrote
+    to a page match `desired`.
+
+    The sync only owns the first `managed` blocks of a page, the ones it wrote
+    last time, and never touches anything after them, like notes added by
+    hand. If `managed` isn't known, a page whose first blocks already match
+    `desired` is left alone, and otherwise the blocks at the top of the page
+    that follow the layout of `desired` (see `layout_length`) are taken to be
+    the sync's. Within the blocks it owns, the longest prefix matching
+    `desired` is kept, the rest are deleted and the rest of `desired` is
+    inserted after them. Returns the IDs of the blocks to delete, the ID of the
+    block to insert after (None for the end of the page) and the blocks to
+    insert.
+
+    >>> def block(text, id=None, block_type="paragraph"):
+    ...     content = {"rich_text": [{"plain_text": text}]}
+    ...     return {"id": id, "type": block_type, block_type: content}
+    >>> page = [block("a", "1"), block("b", "2"), block("my note", "3")]
+    >>> diff_blocks(page, [block("a"), block("c")], managed=2)[:2]
+    (['2'], '2')
+    >>> page[2] = block("my note", "3", block_type="quote")
+    >>> diff_blocks(page, [block("a"), block("c")])[:2]
+    (['2'], '2')
+    >>> diff_blocks(page, [block("a"), block("b")])
+    ([], '2', [])
+    """
+    if managed is None:
+        owned = existing[: layout_length(existing, desired)]
+    else:
+        owned = existing[:managed]
+    prefix = 0
+    for old, new in zip(owned, desired):
+        if normalise_block(old) != normalise_block(new):
+            break
+        prefix += 1
+
+    if managed is None and prefix == len(desired):
+        # Nothing has changed, so any blocks after these may be notes
+        owned = owned[:prefix]
+    after = owned[-1]["id"] if owned else None
+    return [block["id"] for block in owned[prefix:]], after, desired[prefix:]
+
+
+async def list_children(
+    writer: "NotionWriter", block_id: str, stats: "PhaseStats | None" = None
+) -> list[dict[str, Any]]:
+    """Fetch every child block of a page"""
+    blocks = []
+    kwargs = {"page_size": MAX_BLOCKS_PER_REQUEST}
+    while True:
+        resp = await writer.call(
+            writer.notion.blocks.children.list, block_id, stats=stats, **kwargs
+        )
+        blocks.extend(resp["results"])
+        if not resp["has_more"]:
+            return blocks
+        kwargs["start_cursor"] = resp["next_cursor"]
+
+
+async def append_children(
+    writer: "NotionWriter",
+    block_id: str,
+    blocks: list[dict[str, Any]],
+    stats: "PhaseStats | None" = None,
+    after: str | None = None,
+) -> None:
+    """Add blocks to a page, in as few requests as Notion allows.
+
+    The blocks go after the block with the ID `after` if given, otherwise at
+    the end of the page.
+    """
+    for chunk in chunks(blocks):
+        kwargs = {"children": chunk}
+        if after is not None:
+            kwargs["after"] = after
+        resp = await writer.call(
+            writer.notion.blocks.children.append, block_id, stats=stats, **kwargs
+        )
+        if after is not None:
+            # The next chunk goes after the last block of this one
+            after = resp["results"][-1]["id"]
+
+
+async def sync_body(
+    writer: "NotionWriter",
+    page_id: str,
+    desired: list[dict[str, Any]],
+    stats: "PhaseStats | None" = None,
+    managed: int | None = None,
+) -> None:
+    """Make the blocks the sync wrote to a page match `desired`, sending only
+    what has changed. See `diff_blocks` for which blocks are the sync's."""
+    existing = await list_children(writer, page_id, stats)
+    to_delete, after, to_insert = diff_blocks(existing, desired, managed)
+
+    # New blocks go in before the old ones are deleted, as they may be placed
+    # after one of them
+    await append_children(writer, page_id, to_insert, stats, after=after)
+
+    for block_id in to_delete:
+        await writer.call(writer.notion.blocks.delete, block_id, stats=stats)
@@ -0,0 +1,114 @@
+"""Parse the titles and shelf tags of books in Goodreads RSS feeds"""
+
+import re
+from collections.abc import Iterable
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+# A series in brackets at the end of a title, e.g. "(Dune, #1)". The number can
+# be a single entry (#3), an omnibus or novella (#1-3, #0.1) or an omnibus with
+# a novella (#0.1-4).
+SERIES_PATTERN = re.compile(r".+ \(((.+?),? #(\d+\.\d+-\d+|\d+[-.]\d+|\d+))\)")
+
+
+class BookInfo(NamedTuple):
+    title: str
+    subtitle: str
+    series: str
+    series_num: str
+
+
+class ShelfTags(NamedTuple):
+    fiction: bool
+    owned: bool
+    reread: bool
+    formats: tuple[str, ...]
+    topics: tuple[str, ...]
+
+
+def get_subtitle(title: str) -> str:
+    """Extract a subtitle from a book's title"""
+    return title.split(":")[1].strip()
+
+
+def get_series_info(title: str) -> tuple[str, str, str]:
+    """Extract book series info from a title string.
+
+    >>> get_series_info("Dune (Dune, #1)")
+    ('(Dune, #1)', 'Dune', '1')
+    >>> get_series_info("The Expanse (The Expanse #1-3)")
+    ('(The Expanse #1-3)', 'The Expanse', '1-3')
+    >>> get_series_info("Edge of Dark Water (Mongrels, #0.1)")
+    ('(Mongrels, #0.1)', 'Mongrels', '0.1')
+    >>> get_series_info("Omnibus (Saga, #0.1-4)")
+    ('(Saga, #0.1-4)', 'Saga', '0.1-4')
+    >>> get_series_info("Not In A Series (2nd edition)")
+    ('', '', '')
+    """
+    match = SERIES_PATTERN.fullmatch(title)
+    if match is None:
+        return "", "", ""
+
+    series = f"({match.group(1).strip()})"
+    return series, match.group(2).strip(), match.group(3).strip()
+
+
+@lru_cache(maxsize=8192)
+def get_clean_book_info(book_title: str) -> BookInfo:
+    """Extract title, subtitle, and series
+
+    >>> get_clean_book_info('Leviathan Wakes: A "Novel" (The Expanse, #1)')
+    BookInfo(title='Leviathan Wakes', subtitle='A "Novel"', series='The Expanse', series_num='1')
+    >>> get_clean_book_info('The "Hobbit"')
+    BookInfo(title="The 'Hobbit'", subtitle='', series='', series_num='')
+    """
+    if ("(" in book_title) and ("#" in book_title):
+        series, series_name, series_num = get_series_info(book_title)
+        book_title = book_title.replace(series, "")
+    else:
+        series = series_name = series_num = ""
+
+    if ":" in book_title:
+        subtitle = get_subtitle(book_title)
+        book_title = book_title.replace(subtitle, "")
+    else:
+        subtitle = ""
+
+    # Double quotes are swapped for single ones, as they always have been, so
+    # the titles of existing pages don't all change and get rewritten
+    book_title = book_title.replace(":", "").replace('"', "'")
+    return BookInfo(book_title.strip(), subtitle, series_name, series_num)
+
+
+@lru_cache(maxsize=8192)
+def parse_shelf_tags(user_shelves: str) -> ShelfTags:
+    """Pull the flags, formats and topics out of a book's comma separated shelves
+
+    >>> parse_shelf_tags("owned, format-paperback, topic-science-fiction, re-read")
+    ShelfTags(fiction=True, owned=True, reread=True, formats=('paperback',), topics=('science-fiction',))
+    >>> parse_shelf_tags("non-fiction, format-audio-book")
+    ShelfTags(fiction=False, owned=False, reread=False, formats=('audio:book',), topics=())
+    """
+    formats = []
+    topics = []
+    for tag in user_shelves.split(", "):
+        if tag.startswith("format"):
+            formats.append(":".join(tag.split("-")[1:]))
+        elif tag.startswith("topic"):
+            topics.append("-".join(tag.split("-")[1:]))
+
+    return ShelfTags(
+        fiction="non-fiction" not in user_shelves,
+        owned="owned" in user_shelves,
+        reread="re-read" in user_shelves,
+        formats=tuple(formats),
+        topics=tuple(topics),
+    )
+
+
+def parse_entries(entries: Iterable[Any]) -> list[tuple[BookInfo, ShelfTags]]:
+    """Parse the title and shelves of every entry in one go"""
+    return [
+        (get_clean_book_info(entry.title), parse_shelf_tags(entry.user_shelves))
+        for entry in entries
+    ]
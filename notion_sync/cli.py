@@ -0,0 +1,264 @@
+import argparse
+import os
+import sys
+from collections.abc import Callable
+from datetime import timedelta
+from pathlib import Path
+
+from rich.console import Console
+
+from notion_sync.engine import SyncEngine
+from notion_sync.metrics import Metrics, process_age
+from notion_sync.sink import NotionSink
+from notion_sync.source import Source
+from notion_sync.transport import HTTPConfig, HTTPSession
+from notion_sync.writer import TokenBucket
+
+
+def add_sync_options(parser: argparse.ArgumentParser) -> None:
+    """Add the options shared by every way of running syncs"""
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only pull pages edited, and items changed, since the last sync",
+    )
+    parser.add_argument(
+        "--max-age-days",
+        type=float,
+        default=7,
+        help="Run a full sync instead if the last one was longer ago than this",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of processes used to build pages, 0 for one per CPU",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        metavar="SECONDS",
+        help="Stop starting writes after this long, leaving the rest for the next "
+        "run, which sends them first (archiving is left until last)",
+    )
+    parser.add_argument(
+        "--metrics-json",
+        type=Path,
+        metavar="PATH",
+        help="Save request and phase timings to a JSON file",
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        type=Path,
+        metavar="PATH",
+        help="Save request and phase timings as a Prometheus textfile",
+    )
+    http = parser.add_argument_group("HTTP")
+    http.add_argument(
+        "--max-connections",
+        type=int,
+        default=HTTPConfig.max_connections,
+        help="Connections kept open at once, shared by every request",
+    )
+    http.add_argument(
+        "--timeout",
+        type=float,
+        default=HTTPConfig.timeout,
+        metavar="SECONDS",
+        help="How long to wait for each response",
+    )
+    http.add_argument(
+        "--http2",
+        action="store_true",
+        help="Use HTTP/2 where servers support it (needs the h2 package)",
+    )
+
+
+def build_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    add_sync_options(parser)
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--plan",
+        type=Path,
+        metavar="PLAN_FILE",
+        help="Save the writes a sync would make to a JSONL file instead of sending them",
+    )
+    mode.add_argument(
+        "--apply",
+        type=Path,
+        metavar="PLAN_FILE",
+        help="Send the writes saved by --plan, resuming where a previous attempt stopped",
+    )
+    mode.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running, polling the source and syncing whenever it changes",
+    )
+    watch = parser.add_argument_group("watch mode")
+    watch.add_argument(
+        "--interval",
+        type=float,
+        default=300,
+        metavar="SECONDS",
+        help="How often to poll the source",
+    )
+    watch.add_argument(
+        "--debounce",
+        type=float,
+        default=60,
+        metavar="SECONDS",
+        help="Wait until the source has been unchanged for this long before syncing",
+    )
+    watch.add_argument(
+        "--max-delay",
+        type=float,
+        metavar="SECONDS",
+        help="Sync changes at most this long after they were seen, even if the "
+        "source keeps changing (default: 4 times --debounce)",
+    )
+    watch.add_argument(
+        "--resync-interval",
+        type=float,
+        default=3600,
+        metavar="SECONDS",
+        help="How often to run a full sync, to pick up edits made in Notion",
+    )
+    watch.add_argument(
+        "--health-port",
+        type=int,
+        metavar="PORT",
+        help="Serve /healthz and /metrics on this local port",
+    )
+    return parser
+
+
+def http_config(args: argparse.Namespace) -> HTTPConfig:
+    return HTTPConfig(
+        max_connections=args.max_connections,
+        max_keepalive_connections=args.max_connections,
+        timeout=args.timeout,
+        http2=args.http2,
+    )
+
+
+def load_env() -> None:
+    """Load variables from a .env file when running locally, if python-dotenv is
+    installed"""
+    if os.getenv("CI", False):
+        return
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        # Load in .env file
+        load_dotenv()
+
+
+def main(
+    make_source: Callable[[dict[str, str]], Source],
+    cache_dir: Path,
+    description: str,
+    required_env: tuple[str, ...] = (),
+    argv: list[str] | None = None,
+) -> None:
+    """Run a sync from the command line.
+
+    `make_source` is given the values of the required environment variables
+    and returns the source to sync from. Checkpoints and downloads are kept in
+    `cache_dir`.
+    """
+    startup = process_age()
+
+    load_env()
+    args = build_parser(description).parse_args(argv)
+
+    # Consume environment variables, and check they are set
+    env = {
+        name: os.getenv(name)
+        for name in ("NOTION_TOKEN", "NOTION_DATABASE_ID", *required_env)
+    }
+    for name, val in env.items():
+        if val is None:
+            raise ValueError(f"{name} must be set!")
+
+    console = Console(force_terminal=True)
+    source = make_source(env)
+    metrics = Metrics(source=source.name)
+    if startup is not None:
+        metrics.phases["startup"] = startup
+    # Every request to Notion and the source goes over the same connections,
+    # and reads and writes to Notion share one rate limit
+    session = HTTPSession(http_config(args))
+    engine = SyncEngine(
+        source,
+        NotionSink(
+            env["NOTION_TOKEN"],
+            env["NOTION_DATABASE_ID"],
+            console,
+            metrics=metrics,
+            bucket=TokenBucket(),
+            session=session,
+        ),
+        Path(cache_dir).joinpath("sync-state.json"),
+    )
+
+    try:
+        ok = _run(engine, args)
+    finally:
+        session.close()
+        for line in metrics.table():
+            console.print(f"[blue]{line}")
+        if args.metrics_json:
+            metrics.save_json(args.metrics_json)
+        if args.metrics_prom:
+            metrics.save_prometheus(args.metrics_prom)
+
+    if ok is not None:
+        sys.exit(0 if ok else 1)
+
+
+def _run(engine: SyncEngine, args: argparse.Namespace) -> bool | None:
+    """Run whichever mode was asked for, returning whether every write succeeded"""
+    ci = os.getenv("CI", False)
+
+    max_age = timedelta(days=args.max_age_days)
+    workers = args.workers or None
+
+    if args.plan:
+        engine.export_plan(args.plan, args.incremental, max_age, workers)
+        return None
+
+    if args.watch:
+        from notion_sync.watch import Watcher
+
+        watcher = Watcher(
+            engine,
+            interval=args.interval,
+            debounce=args.debounce,
+            max_delay=args.max_delay,
+            resync_interval=args.resync_interval,
+            max_age=max_age,
+            workers=workers,
+        )
+        if args.health_port is not None:
+            watcher.serve(args.health_port)
+        watcher.run()
+        return watcher.status.ok is not False
+
+    # Progress bars are only drawn locally, CI logs get a summary line per
+    # phase instead
+    if args.apply:
+        ok = engine.apply_plan(
+            args.apply, show_progress=not ci, time_budget=args.time_budget
+        )
+    else:
+        ok = engine.run(
+            incremental=args.incremental,
+            max_age=max_age,
+            show_progress=not ci,
+            workers=workers,
+            time_budget=args.time_budget,
+        )
+    return ok
@@ -0,0 +1,378 @@
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from rich.console import Console
+
+from notion_sync.metrics import Metrics
+from notion_sync.operations import CREATE, Operation
+from notion_sync.planfile import (
+    PHASES,
+    DoneLog,
+    PlanError,
+    PlanSummary,
+    done_path,
+    read_plan,
+    write_plan,
+)
+from notion_sync.planner import Plan, build_plan
+from notion_sync.query import edited_since
+from notion_sync.sink import NotionSink
+from notion_sync.source import Source
+from notion_sync.state import SyncState, now
+from notion_sync.writer import PhaseStats
+
+
+def deadline(time_budget: float | None) -> float | None:
+    """The `time.monotonic()` value at which a budget of seconds runs out"""
+    return None if time_budget is None else time.monotonic() + time_budget
+
+
+class Snapshot(NamedTuple):
+    """The items listed by a source, along with their titles and change markers,
+    each keyed by the item's key"""
+
+    items: dict[str, Any]
+    titles: dict[str, str]
+    markers: dict[str, str]
+
+
+class SyncEngine:
+    """Sync the items from a source to a Notion database"""
+
+    def __init__(
+        self,
+        source: Source,
+        sink: NotionSink,
+        state_path: Path,
+        console: Console | None = None,
+    ):
+        self.source = source
+        self.sink = sink
+        self.state_path = Path(state_path)
+        # Writes left over by a run which ran out of time, applied by the next
+        self.queue_path = self.state_path.with_name("pending-plan.jsonl")
+        self.console = console or sink.console
+
+        # Requests are only recorded if the sink was given somewhere to record
+        # them, but phases are always timed
+        self.metrics = sink.metrics or Metrics(source=source.name)
+        self.source.metrics = self.metrics
+        # The source fetches its items over the same connections as the sink,
+        # and reports problems with them alongside the rest of the sync
+        self.source.session = sink.session
+        self.source.console = self.console
+
+        # The checkpoint is kept in memory between syncs by a long-running
+        # process, rather than being read back every time
+        self.state: SyncState | None = None
+
+    def fetch(self) -> Snapshot:
+        """List the items in the source, keeping the first item for each key"""
+        snapshot = Snapshot({}, {}, {})
+        with self.metrics.phase("fetch source"):
+            for key, title, marker, item in self.source.items():
+                if key not in snapshot.items:
+                    snapshot.items[key] = item
+                    snapshot.titles[key] = title
+                    snapshot.markers[key] = marker
+        return snapshot
+
+    def plan(
+        self,
+        incremental: bool = False,
+        max_age: timedelta = timedelta(days=7),
+        workers: int | None = 1,
+        snapshot: Snapshot | None = None,
+    ) -> tuple[Plan, SyncState, dict[str, str]]:
+        """Work out what needs writing to Notion.
+
+        Pages are built by `workers` processes, see `Source.page_payloads`.
+        The source is listed unless a `snapshot` of it is given. Returns the
+        plan, the checkpoint it was planned against and the change markers of
+        every item in the source.
+        """
+        items, titles, markers = snapshot or self.fetch()
+        markers = dict(markers)
+
+        key_property = self.source.key_property
+        properties = self.source.properties
+
+        state = self.state or SyncState.load(self.state_path)
+        if incremental and state.is_fresh(max_age):
+            # Only pull pages edited since the last run from Notion, and only
+            # compare items which changed, or whose page changed, since then
+            self.console.print("[green]Syncing changes since", state.last_run)
+            with self.metrics.phase("paginate Notion"):
+                pages, drifted = state.merge_pages(
+                    self.sink.pages(
+                        key_property, properties, filter=edited_since(state.last_run)
+                    )
+                )
+            dirty = state.dirty_keys(markers, pages, drifted)
+        else:
+            # A full sync pulls every page and compares every item
+            state = state.restart()
+            with self.metrics.phase("paginate Notion"):
+                pages, _ = state.merge_pages(self.sink.pages(key_property, properties))
+            dirty = set(items)
+
+        # Build the full page for each item which needs comparing. Items that
+        # can't be turned into a page are skipped rather than ending the sync.
+        keys = [key for key in items if key in dirty]
+        source = {}
+        skipped = set()
+        with self.metrics.phase("build pages"):
+            payloads = self.source.page_payloads(
+                [items[key] for key in keys], workers=workers
+            )
+            for key, payload in zip(keys, payloads):
+                if isinstance(payload, Exception):
+                    self.console.print(f"[red]Skipping {titles[key]}")
+                    self.console.print(f"{type(payload).__name__}: {payload}")
+                    # Make sure the item is tried again next time
+                    del markers[key]
+                    skipped.add(key)
+                else:
+                    source[key] = payload
+
+        # Reconcile the source with the Notion db in a single pass over each
+        with self.metrics.phase("diff"):
+            # The pages of skipped items are kept, not archived
+            plan = build_plan(
+                self.sink.database_id,
+                source,
+                pages,
+                clean_keys=items.keys() - dirty,
+                skipped_keys=skipped,
+            )
+
+        self.console.print("[green]Number of pages to be updated:", len(plan.update))
+        self.console.print("[green]Number of unchanged pages skipped:", plan.unchanged)
+        self.console.print("[green]Number of pages to be created:", len(plan.create))
+        self.console.print("[green]Number of pages to be archived:", len(plan.archive))
+        if plan.bodies:
+            self.console.print(
+                "[green]Number of page bodies to be synced:", len(plan.bodies)
+            )
+
+        return plan, state, markers
+
+    def run(
+        self,
+        incremental: bool = False,
+        max_age: timedelta = timedelta(days=7),
+        show_progress: bool = True,
+        workers: int | None = 1,
+        snapshot: Snapshot | None = None,
+        time_budget: float | None = None,
+    ) -> bool:
+        """Plan and apply a sync, returning whether every write succeeded.
+
+        With a `time_budget` in seconds, no more writes are started once it has
+        been spent. The writes left are saved to `queue_path`, and the next run
+        applies them before planning anything new.
+        """
+        until = deadline(time_budget)
+
+        ok = True
+        if self.queue_path.exists():
+            self.console.print("[green]Applying writes left over by the last run")
+            try:
+                ok, deferred = self._apply_plan(self.queue_path, show_progress, until)
+            except PlanError as e:
+                # e.g. a plan file was applied since. Items whose writes were
+                # deferred are still marked for comparing in the checkpoint.
+                self.console.print(f"[yellow]Discarding them: {e}")
+                deferred = 0
+            if deferred:
+                return ok
+            self.queue_path.unlink()
+            done_path(self.queue_path).unlink(missing_ok=True)
+
+        if until is not None and time.monotonic() >= until:
+            self.console.print("[yellow]Out of time, skipping the sync")
+            return ok
+
+        started = now()
+        plan, state, markers = self.plan(incremental, max_age, workers, snapshot)
+
+        # Send the writes to Notion concurrently, within the API's rate limits
+        phase_stats = self.sink.apply(plan, show_progress=show_progress, deadline=until)
+
+        if not self.finish(
+            state, started, markers, plan.synced, plan.operations, phase_stats
+        ):
+            ok = False
+
+        deferred = Plan()
+        for phase, stats in zip(PHASES, phase_stats):
+            getattr(deferred, phase).extend(stats.deferred)
+        if deferred.operations:
+            failed_keys = {op.key for stats in phase_stats for op, _ in stats.failed}
+            summary = write_plan(
+                self.queue_path,
+                deferred,
+                source=self.source.name,
+                database_id=self.sink.database_id,
+                started=started,
+                # Recorded once the writes left have been applied, leaving out
+                # the items whose writes failed, as this run's checkpoint does
+                markers={
+                    key: marker
+                    for key, marker in markers.items()
+                    if key not in failed_keys
+                },
+                synced={
+                    page_id: (
+                        {**entry, "hash": None}
+                        if entry["key"] in failed_keys
+                        else entry
+                    )
+                    for page_id, entry in plan.synced.items()
+                },
+                state=asdict(self.state),
+            )
+            self.console.print(
+                f"[yellow]Saved {summary.operations} operations left to "
+                f"{self.queue_path} for the next run"
+            )
+
+        return ok
+
+    def export_plan(
+        self,
+        path: Path,
+        incremental: bool = False,
+        max_age: timedelta = timedelta(days=7),
+        workers: int | None = 1,
+    ) -> PlanSummary:
+        """Plan a sync and save it to a plan file, without writing to Notion"""
+        started = now()
+        plan, state, markers = self.plan(incremental, max_age, workers)
+
+        summary = write_plan(
+            path,
+            plan,
+            source=self.source.name,
+            database_id=self.sink.database_id,
+            started=started,
+            markers=markers,
+            synced=plan.synced,
+            state=asdict(state),
+        )
+        self.console.print(
+            f"[green]Saved {summary.operations} operations to {path} "
+            f"({summary.bytes / 1024:.1f} KiB of payloads, "
+            f"at least {summary.requests} requests)"
+        )
+        return summary
+
+    def apply_plan(
+        self,
+        path: Path,
+        show_progress: bool = True,
+        time_budget: float | None = None,
+    ) -> bool:
+        """Apply a saved plan file, skipping operations that already succeeded.
+
+        Returns whether every write succeeded. If it didn't, or the
+        `time_budget` in seconds ran out, applying the same file again sends
+        only the operations which are left.
+        """
+        ok, _ = self._apply_plan(path, show_progress, deadline(time_budget))
+        return ok
+
+    def _apply_plan(
+        self, path: Path, show_progress: bool, until: float | None
+    ) -> tuple[bool, int]:
+        """Apply a plan file, returning whether every write succeeded and how
+        many operations were left once `until` had passed"""
+        header, plan, ops = read_plan(path)
+        if header["database_id"] != self.sink.database_id:
+            raise PlanError(f"{path} was planned for a different database")
+
+        # The checkpoint saved once the plan is applied is the one it was
+        # planned against, so it can't be applied over a later sync's
+        current = self.state or SyncState.load(self.state_path)
+        if current.last_run is not None and datetime.fromisoformat(
+            current.last_run
+        ) > datetime.fromisoformat(header["started"]):
+            raise PlanError(
+                f"{path} was planned before the last sync ran, make a new plan"
+            )
+
+        log = DoneLog(path)
+        done = log.load()
+        op_ids = {id(op): op_id for op_id, op in ops.items()}
+
+        pending = Plan()
+        for phase in PHASES:
+            for op in getattr(plan, phase):
+                op_id = op_ids[id(op)]
+                if op_id not in done:
+                    getattr(pending, phase).append(op)
+                elif op.kind == CREATE:
+                    # Needed to record the new page in the checkpoint
+                    op.page_id = done[op_id]
+
+        if done:
+            self.console.print(
+                f"[green]Resuming {path}, {len(done)} of {len(ops)} operations "
+                "already applied"
+            )
+
+        with log:
+            phase_stats = self.sink.apply(
+                pending,
+                show_progress=show_progress,
+                on_done=lambda op: log.record(op_ids[id(op)], op.page_id),
+                deadline=until,
+            )
+
+        ok = self.finish(
+            SyncState(**header["state"]),
+            header["started"],
+            header["markers"],
+            header["synced"],
+            list(ops.values()),
+            phase_stats,
+        )
+        return ok, sum(len(stats.deferred) for stats in phase_stats)
+
+    def finish(
+        self,
+        state: SyncState,
+        started: str,
+        markers: dict[str, str],
+        synced: dict[str, dict],
+        ops: list[Operation],
+        phase_stats: list[PhaseStats],
+    ) -> bool:
+        """Record the outcome of applying a plan in the checkpoint.
+
+        Operations which were deferred are recorded like those which failed,
+        so their items are compared again if they are never applied.
+        """
+        for stats in phase_stats:
+            self.metrics.add_phase_stats(stats)
+
+        failed = [op for stats in phase_stats for op, _ in stats.failed]
+        deferred = [op for stats in phase_stats for op in stats.deferred]
+        state.record(started, markers, synced, ops, failed + deferred)
+        state.save(self.state_path)
+        self.state = state
+
+        if deferred:
+            self.console.print(
+                f"[yellow]Out of time, {len(deferred)} operations deferred"
+            )
+        if failed:
+            self.console.print("[red]Sync finished with errors!")
+            return False
+
+        if not deferred:
+            self.console.print("[green]Sync complete!")
+        return True
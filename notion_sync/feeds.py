@@ -0,0 +1,106 @@
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+if TYPE_CHECKING:
+    import feedparser
+
+
+class FeedCache:
+    """Store the entries of RSS feeds on disk, along with their validators.
+
+    Each feed is saved as a JSON file holding the ETag and Last-Modified values
+    from the last successful response, so the next request can be conditional.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def path(self, key: str) -> Path:
+        return self.directory.joinpath(re.sub(r"[^\w-]", "_", key) + ".json")
+
+    def load(self, key: str) -> dict[str, Any] | None:
+        try:
+            with open(self.path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, key: str, etag, modified, entries: list[dict]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so a crash never leaves a corrupt cache
+        tmp_path = self.path(key).with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"etag": etag, "modified": modified, "entries": entries},
+                f,
+                default=str,
+            )
+        tmp_path.replace(self.path(key))
+
+
+def fetch_feed(
+    url: str, key: str, cache: FeedCache, client: httpx.Client
+) -> list["feedparser.FeedParserDict"]:
+    """Fetch the entries of an RSS feed, reusing the cached copy if unchanged.
+
+    The feed is downloaded with `client`, so over its pooled connections, and
+    only handed to feedparser to parse.
+    """
+    # Imported here as it's slow to import, and only needed when fetching
+    import feedparser
+
+    cached = cache.load(key) or {}
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("modified"):
+        headers["If-Modified-Since"] = cached["modified"]
+
+    try:
+        response = client.get(url, headers=headers)
+    except httpx.HTTPError as err:
+        # An empty list of entries would archive every page, so fail loudly
+        raise RuntimeError(f"Could not fetch the {key} feed: {err!r}") from err
+
+    if response.status_code == 304 and "entries" in cached:
+        # Not modified, so there's nothing to parse and we use the cache
+        return [feedparser.FeedParserDict(entry) for entry in cached["entries"]]
+
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f"Could not fetch the {key} feed (status {response.status_code})"
+        )
+
+    feed = feedparser.parse(response.content, response_headers=dict(response.headers))
+    if feed.get("bozo") and not feed.entries:
+        raise RuntimeError(
+            f"Could not parse the {key} feed: {feed.get('bozo_exception')}"
+        )
+
+    cache.save(
+        key,
+        response.headers.get("etag"),
+        response.headers.get("last-modified"),
+        feed.entries,
+    )
+    return feed.entries
+
+
+def fetch_feeds(
+    urls: dict[str, str],
+    cache: FeedCache,
+    client: httpx.Client,
+    max_workers: int = 8,
+) -> dict[str, list["feedparser.FeedParserDict"]]:
+    """Fetch several feeds concurrently, returning their entries in the same order"""
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            key: pool.submit(fetch_feed, url, key, cache, client)
+            for key, url in urls.items()
+        }
+        return {key: future.result() for key, future in futures.items()}
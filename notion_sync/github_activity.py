@@ -0,0 +1,87 @@
+"""Sync open GitHub issues and pull requests assigned to, or awaiting review by, the
+user from the github-activity-dashboard repo"""
+
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+from notion_sync.github_csv import download, iter_open_items
+from notion_sync.source import Source
+
+# The raw data from sister repo
+DATA_URL = "https://raw.githubusercontent.com/sgibson91/github-activity-dashboard/main/github-activity.csv"
+
+
+def create_page_metadata(item):
+    properties = {
+        "Filters": {"type": "multi_select"},
+        "PR": {
+            "type": "checkbox",
+            "checkbox": bool(item["pull_request"]),
+        },
+        "Repository URL": {"type": "url", "url": item["repo_url"]},
+        "Title": {
+            "title": [
+                {
+                    "text": {
+                        "content": item["raw_title"],
+                    },
+                }
+            ]
+        },
+        "URL": {"type": "url", "url": item["link"]},
+        "Created at": {
+            "type": "date",
+            "date": {"start": item["created_at"].isoformat()},
+        },
+        "Updated at": {
+            "type": "date",
+            "date": {"start": item["updated_at"].isoformat()},
+        },
+    }
+
+    # Handle the `filter` property
+    filters_to_apply = [
+        filter_name.replace("_", " ") for filter_name in set(item["filter"].split(":"))
+    ]
+    properties["Filters"]["multi_select"] = []
+
+    # Populate filters
+    for filter_name in filters_to_apply:
+        properties["Filters"]["multi_select"].append({"name": filter_name})
+
+    return properties
+
+
+class GitHubActivitySource(Source):
+    """Open items from the GitHub activity CSV"""
+
+    name = "github-activity"
+    # Titles change, and different repos have issues with the same title
+    key_property = "URL"
+    properties = (
+        "Filters",
+        "PR",
+        "Repository URL",
+        "Title",
+        "URL",
+        "Created at",
+        "Updated at",
+    )
+
+    def __init__(self, cache_dir: Path, data_url: str = DATA_URL):
+        self.cache_dir = Path(cache_dir)
+        self.data_url = data_url
+
+    def items(self) -> Iterator[tuple[str, str, str, Any]]:
+        # The file is only downloaded if it has changed since the last run, and
+        # is then streamed in chunks
+        with self.http_client() as client:
+            csv_path = download(
+                self.data_url, self.cache_dir.joinpath("github-activity.csv"), client
+            )
+        for row in iter_open_items(csv_path, self.console):
+            yield row["link"], row["raw_title"], row["updated_at"].isoformat(), row
+
+    def page_payload(self, item: dict[str, Any]) -> dict[str, Any]:
+        return {"properties": create_page_metadata(item)}
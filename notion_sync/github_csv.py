@@ -0,0 +1,112 @@
+import csv
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+from rich.console import Console
+
+# The only columns of github-activity.csv the sync uses
+CSV_COLUMNS = [
+    "raw_title",
+    "filter",
+    "state",
+    "pull_request",
+    "repo_url",
+    "link",
+    "created_at",
+    "updated_at",
+]
+
+
+def download(url: str, path: Path, client: httpx.Client) -> Path:
+    """Stream `url` to `path`, skipping the download if our copy is up to date.
+
+    The ETag of the downloaded file is kept next to it and sent back as
+    If-None-Match, so an unchanged file costs a single 304 response.
+    """
+    path = Path(path)
+    etag_path = path.with_suffix(path.suffix + ".etag")
+    headers = {}
+    if path.exists() and etag_path.exists():
+        headers["If-None-Match"] = etag_path.read_text().strip()
+
+    with client.stream("GET", url, headers=headers) as resp:
+        if resp.status_code == 304:
+            return path
+        resp.raise_for_status()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, "wb") as f:
+            for chunk in resp.iter_bytes():
+                f.write(chunk)
+        tmp_path.replace(path)
+
+        if "etag" in resp.headers:
+            etag_path.write_text(resp.headers["etag"])
+        else:
+            etag_path.unlink(missing_ok=True)
+
+    return path
+
+
+def parse_row(row: dict[str, str]) -> dict[str, Any]:
+    """Keep the columns we need from a row, parsing the dates and PR flag.
+
+    Empty cells become None. Any value for `pull_request` other than an empty
+    cell or `false` marks the item as a PR. Raises ValueError if either date
+    is missing or can't be parsed.
+
+    >>> row = parse_row({
+    ...     "raw_title": "Fix it", "filter": "assigned", "state": "open",
+    ...     "pull_request": "True", "repo_url": "", "link": "https://github.com/o/r/pull/1",
+    ...     "created_at": "2024-01-01T00:00:00Z", "updated_at": "2024-01-02T00:00:00Z",
+    ...     "number": "1",
+    ... })
+    >>> row["pull_request"], row["repo_url"], row["updated_at"].isoformat()
+    (True, None, '2024-01-02T00:00:00+00:00')
+    >>> "number" in row
+    False
+    >>> parse_row({**row, "pull_request": "{'url': '...'}", "created_at": "2024-01-01",
+    ...     "updated_at": "2024-01-02"})["pull_request"]
+    True
+    >>> parse_row({**row, "pull_request": "False", "created_at": "2024-01-01",
+    ...     "updated_at": "2024-01-02"})["pull_request"]
+    False
+    """
+    item = {column: row.get(column) or None for column in CSV_COLUMNS}
+    item["pull_request"] = (item["pull_request"] or "false").lower() != "false"
+    for column in ("created_at", "updated_at"):
+        if item[column] is None:
+            raise ValueError(f"{column} is empty")
+        item[column] = datetime.fromisoformat(item[column])
+    return item
+
+
+def iter_open_items(
+    path: Path, console: Console | None = None
+) -> Iterator[dict[str, Any]]:
+    """Yield the open items that are assigned to, or awaiting review by, the user.
+
+    The CSV is streamed a row at a time with the standard library, so memory
+    use doesn't grow with the size of the file, and only the rows which are
+    kept have their dates parsed. Rows which can't be parsed are reported to
+    `console` and skipped, rather than ending the sync.
+    """
+    console = console or Console(force_terminal=True)
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            # Filter for items that are 'review_requested' or 'assigned', and open
+            if row["state"] != "open":
+                continue
+            if "assigned" in row["filter"] or "review_requested" in row["filter"]:
+                try:
+                    item = parse_row(row)
+                except ValueError as e:
+                    console.print(
+                        f"[red]Skipping {row['link'] or row['raw_title']}: {e}"
+                    )
+                    continue
+                yield item
@@ -0,0 +1,251 @@
+"""Sync the books on a user's Goodreads shelves"""
+
+import hashlib
+import json
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from notion_sync.book_info import get_clean_book_info, parse_entries, parse_shelf_tags
+from notion_sync.feeds import FeedCache, fetch_feeds
+from notion_sync.payload_cache import PayloadCache, digest
+from notion_sync.source import Source
+from notion_sync.templates import CompiledTemplate
+
+RSS_BASE_URL = "https://www.goodreads.com/review/list_rss/{user_id}?key={key}&shelf="
+
+# Properties set by `create_page_metadata` which aren't in the template
+DATE_PROPERTIES = ("Date last started", "Date last read")
+
+# The page of a book, written to the "Goodreads" property of each page
+BOOK_URL = "https://www.goodreads.com/book/show/{book_id}"
+
+# Bump when `create_page_metadata` changes, to rebuild every cached page
+PAGE_VERSION = 2
+
+# The fields of a feed entry which `create_page_metadata` reads
+ENTRY_FIELDS = (
+    "title",
+    "author_name",
+    "book_description",
+    "book_id",
+    "book_large_image_url",
+    "user_shelves",
+    "user_rating",
+    "user_date_added",
+    "user_read_at",
+)
+
+
+def converter_version() -> str:
+    from importlib.metadata import PackageNotFoundError, version
+
+    try:
+        return version("html-to-markdown")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def description_markdown(html: str) -> str:
+    """Convert a book's description to Markdown on a single line"""
+    # Only imported once a page needs building, which a no-op sync never does
+    from html_to_markdown import convert
+
+    # Double quotes are swapped for single ones, as they always have been, so
+    # the summaries of existing pages don't all change and get rewritten
+    return convert(html)["content"].replace("\n", "").replace('"', "'")
+
+
+def create_page_metadata(entry, shelf: str, template: CompiledTemplate) -> dict:
+    # We have shelves that are `read-2` or `to-read-3` and we want to remove the
+    # numbering
+    if shelf.startswith("read-"):
+        shelf = "read"
+    elif shelf.startswith("to-read-"):
+        shelf = "to-read"
+
+    title, subtitle, series, series_num = get_clean_book_info(entry.title)
+    book_description = description_markdown(entry.book_description)
+
+    # Create a mapping of template variables for the template
+    metadata_vars = {
+        "author_name": entry.author_name,
+        "book_description": book_description[:2000],
+        "book_id": entry.book_id,
+        "book_title": title,
+        "cover_url": entry.book_large_image_url,
+        "series": series,
+        "shelf": shelf,
+        "series_num": series_num,
+        "subtitle": subtitle,
+    }
+    page_metadata = template.render(**metadata_vars)
+
+    # Add extra variables to the template that require more complex logic
+    tags = parse_shelf_tags(entry.user_shelves)
+    page_metadata["properties"]["Fiction?"]["checkbox"] = tags.fiction
+    page_metadata["properties"]["Rating"]["number"] = (
+        int(entry.user_rating) if int(entry.user_rating) > 0 else None
+    )
+    page_metadata["properties"]["Owned?"]["checkbox"] = tags.owned
+    page_metadata["properties"]["Would re-read?"]["checkbox"] = tags.reread
+
+    for tag in tags.formats:
+        page_metadata["properties"]["Format"]["multi_select"].append({"name": tag})
+
+    for tag in tags.topics:
+        page_metadata["properties"]["Topics"]["multi_select"].append(
+            {"name": tag, "color": "default"}
+        )
+
+    if shelf == "currently-reading":
+        try:
+            date_started = datetime.strptime(
+                entry.user_date_added, "%a, %d %b %Y %H:%M:%S %z"
+            )
+            page_metadata["properties"]["Date last started"] = {
+                "date": {"start": date_started.strftime("%Y-%m-%d")}
+            }
+        except ValueError:
+            print(
+                f"Could not parse started date for {entry.title}: {entry.user_date_added}"
+            )
+    elif shelf.startswith("read"):
+        try:
+            date_read_at = datetime.strptime(
+                entry.user_date_added, "%a, %d %b %Y %H:%M:%S %z"
+            )
+            page_metadata["properties"]["Date last read"] = {
+                "date": {"start": date_read_at.strftime("%Y-%m-%d")}
+            }
+        except ValueError:
+            print(
+                f"Could not parse completed date for {entry.title}: {entry.user_read_at}"
+            )
+
+    # If the book description is longer than 2000 characters, the upload to
+    # Notion will fail. So we chunk up the description into multiple objects
+    # of length 2000 characters.
+    if len(book_description) > 2000:
+        for start in range(2000, len(book_description), 2000):
+            end = start + 2000
+            next_block = book_description[start:end]
+            page_metadata["children"].append(
+                {
+                    "object": "block",
+                    "type": "paragraph",
+                    "paragraph": {
+                        "rich_text": [
+                            {
+                                "type": "text",
+                                "text": {"content": next_block, "link": None},
+                            }
+                        ],
+                        "color": "default",
+                    },
+                }
+            )
+
+    return page_metadata
+
+
+class GoodreadsSource(Source):
+    """Books on a Goodreads user's shelves, from the shelves' RSS feeds"""
+
+    name = "goodreads"
+    # Books are matched by their Goodreads page, which holds the book_id
+    key_property = "Goodreads"
+
+    def __init__(
+        self,
+        user_id: str,
+        rss_key: str,
+        shelves: list[str],
+        template_path: Path,
+        cache_dir: Path,
+        rss_base_url: str = RSS_BASE_URL,
+    ):
+        self.rss_base_url = rss_base_url.format(user_id=user_id, key=rss_key)
+        self.shelves = shelves
+        # Parse the template JSON file once, ready to be filled in for each book
+        with open(template_path, "rb") as f:
+            template_bytes = f.read()
+        skeleton = json.loads(template_bytes)
+        self.template = CompiledTemplate(skeleton)
+        # The dates are only set on books that have been started or read
+        self.properties = (*skeleton["properties"], *DATE_PROPERTIES)
+        self.cache = FeedCache(Path(cache_dir).joinpath("feeds"))
+        # Pages built on previous runs, thrown away if the template, the HTML
+        # converter or the page layout changes
+        template_hash = hashlib.sha256(template_bytes).hexdigest()[:16]
+        self.pages = PayloadCache(
+            Path(cache_dir).joinpath("pages.sqlite"),
+            version=f"{PAGE_VERSION}:{converter_version()}:{template_hash}",
+        )
+
+    def items(self) -> Iterator[tuple[str, str, str, Any]]:
+        # The shelves are fetched concurrently. Responses are cached on disk and
+        # revalidated with conditional requests, so unchanged shelves aren't
+        # reparsed.
+        with self.http_client() as client:
+            feeds = fetch_feeds(
+                {shelf: self.rss_base_url + shelf for shelf in self.shelves},
+                self.cache,
+                client,
+            )
+
+        # The date a book was added to a shelf doesn't change when it is rated
+        # or tagged, so those are part of the marker too
+        for shelf, entries in feeds.items():
+            for entry, (book_info, _) in zip(entries, parse_entries(entries)):
+                marker = "|".join(
+                    [
+                        shelf,
+                        entry.user_date_added,
+                        entry.user_rating,
+                        entry.user_shelves,
+                    ]
+                )
+                key = BOOK_URL.format(book_id=entry.book_id)
+                yield key, book_info.title, marker, (entry, shelf)
+
+    def page_payload(self, item: tuple[Any, str]) -> dict[str, Any]:
+        entry, shelf = item
+        return create_page_metadata(entry, shelf, self.template)
+
+    def page_payloads(
+        self, items: list[tuple[Any, str]], workers: int | None = 1, chunksize: int = 64
+    ) -> Iterator["dict[str, Any] | Exception"]:
+        """Build the pages for many books, reusing those built on earlier runs.
+
+        Converting the description and filling in the template are most of the
+        work, and a book's page only changes when one of its fields does, so
+        only books whose fields changed are built.
+        """
+        digests = {
+            entry.book_id: digest(
+                [shelf, *(entry.get(field) for field in ENTRY_FIELDS)]
+            )
+            for entry, shelf in items
+        }
+        cached = self.pages.get_many(digests)
+        built = super().page_payloads(
+            [item for item in items if item[0].book_id not in cached],
+            workers=workers,
+            chunksize=chunksize,
+        )
+
+        payloads = []
+        new = []
+        for entry, _ in items:
+            payload = cached.get(entry.book_id)
+            if payload is None:
+                payload = next(built)
+                if not isinstance(payload, Exception):
+                    new.append((entry.book_id, digests[entry.book_id], payload))
+            payloads.append(payload)
+
+        # Saved before any payload is handed on, and perhaps changed
+        self.pages.put_many(new)
+        yield from payloads
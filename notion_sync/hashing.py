@@ -0,0 +1,82 @@
+import hashlib
+import json
+from datetime import datetime, timezone
+from typing import Any
+
+# Property types we know how to compare, in the order they are looked for when a
+# property has been written without an explicit "type" key
+PROPERTY_TYPES = [
+    "title",
+    "rich_text",
+    "url",
+    "checkbox",
+    "number",
+    "select",
+    "status",
+    "multi_select",
+    "date",
+]
+
+
+def normalise_date(value: str | None) -> str | None:
+    """Reduce a date string to a canonical form.
+
+    Notion echoes datetimes back with milliseconds and its own UTC offset
+    formatting, so datetimes are converted to UTC and truncated to the minute.
+    Plain dates are left as they are.
+    """
+    if not value or "T" not in value:
+        return value
+
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+
+    return parsed.replace(second=0, microsecond=0).isoformat()
+
+
+def normalise_property(prop: dict[str, Any]) -> Any:
+    """Convert a property value into a plain, comparable value.
+
+    Works for both the property values returned when querying a database and
+    the property values we send when creating or updating a page.
+    """
+    prop_type = prop.get("type")
+    if prop_type not in PROPERTY_TYPES:
+        prop_type = next((key for key in PROPERTY_TYPES if key in prop), None)
+
+    value = prop.get(prop_type)
+
+    if prop_type in ("title", "rich_text"):
+        return "".join(
+            item.get("plain_text", item.get("text", {}).get("content", ""))
+            for item in value or []
+        )
+    if prop_type in ("select", "status"):
+        return value["name"] if value else None
+    if prop_type == "multi_select":
+        return sorted(option["name"] for option in value or [])
+    if prop_type == "date":
+        return normalise_date(value["start"]) if value else None
+    if prop_type == "url":
+        return value or None
+
+    return value
+
+
+def normalise_properties(properties: dict[str, dict]) -> dict[str, Any]:
+    """Normalise every property of a page"""
+    return {name: normalise_property(prop) for name, prop in properties.items()}
+
+
+def content_hash(normalised: dict[str, Any], keys=None) -> str:
+    """Create a stable hash of normalised properties, optionally only of `keys`"""
+    if keys is not None:
+        normalised = {key: normalised.get(key) for key in keys}
+
+    data = json.dumps(normalised, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
@@ -0,0 +1,384 @@
+"""Record where a sync spends its time, and report it at the end of a run.
+
+HTTP clients are instrumented by wrapping their transport, which times every
+request and counts the bytes sent and received, per endpoint. The wall-time
+of each phase of a sync is recorded by the engine. A summary can be saved as
+JSON, or as a Prometheus textfile for the node exporter's textfile collector.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+if TYPE_CHECKING:
+    from notion_sync.writer import PhaseStats
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Page, database and block IDs, and numeric IDs like Goodreads user IDs
+ID_PATTERN = re.compile(r"/(?:[0-9a-f]{32}|[0-9a-f-]{36}|\d+)(?=/|$)")
+
+
+def endpoint_label(method: str, url: httpx.URL | str) -> str:
+    """Name the endpoint a request was sent to, e.g. `GET /v1/pages/{id}`.
+
+    IDs are replaced with a placeholder so requests to the same endpoint are
+    grouped together, and query strings (which can hold keys) are dropped.
+    """
+    url = httpx.URL(url)
+    return f"{method} {url.host}{ID_PATTERN.sub('/{id}', url.path)}"
+
+
+def process_age() -> float | None:
+    """Seconds since this process started, or None where that isn't known.
+
+    Called before any work is done, this is the cost of starting the
+    interpreter and importing everything, which `python -X importtime` breaks
+    down by module. It is read from /proc, so is only known on Linux, to the
+    nearest clock tick.
+    """
+    try:
+        with open("/proc/self/stat") as f:
+            # The command name can hold spaces, so count fields from after it
+            fields = f.read().rpartition(")")[2].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        started = int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(0.0, uptime - started)
+
+
+def _escape(value: str) -> str:
+    """Escape a Prometheus label value"""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...] = LATENCY_BUCKETS
+    counts: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+    sum: float = 0.0
+    count: int = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterator[tuple[str, int]]:
+        """Yield the `le` label and cumulative count of each bucket"""
+        total = 0
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts):
+            total += count
+            yield bound, total
+
+
+@dataclass
+class EndpointStats:
+    latency: Histogram = field(default_factory=Histogram)
+    statuses: Counter = field(default_factory=Counter)
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+
+class Metrics:
+    """Counters and timings for one sync run.
+
+    `labels` are added to every Prometheus sample, e.g. the name of the source,
+    so several syncs can write to the same textfile collector directory.
+    """
+
+    def __init__(self, **labels: str):
+        self.labels = labels
+        self.endpoints: dict[str, EndpointStats] = defaultdict(EndpointStats)
+        self.phases: dict[str, float] = {}
+        self.retries: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        # Requests are made from threads when fetching feeds
+        self._lock = threading.Lock()
+
+    def observe(
+        self,
+        endpoint: str,
+        seconds: float,
+        status: int | None,
+        sent: int = 0,
+        received: int = 0,
+    ) -> None:
+        with self._lock:
+            stats = self.endpoints[endpoint]
+            stats.latency.observe(seconds)
+            stats.statuses[str(status)] += 1
+            stats.bytes_sent += sent
+            stats.bytes_received += received
+
+    def add_received(self, endpoint: str, size: int) -> None:
+        with self._lock:
+            self.endpoints[endpoint].bytes_received += size
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase of the sync"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (
+                time.perf_counter() - start
+            )
+
+    def reset_phases(self) -> None:
+        """Forget the wall-time of every phase, before timing another sync with
+        the same metrics. Counters keep adding up."""
+        self.phases = {}
+
+    def add_phase_stats(self, stats: "PhaseStats") -> None:
+        """Record the wall-time, retries and rate limits of a phase of writes"""
+        self.phases[stats.name] = self.phases.get(stats.name, 0.0) + stats.seconds
+        self.retries[stats.name] += stats.retries
+        self.rate_limited[stats.name] += stats.rate_limited
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "labels": self.labels,
+            "phases": self.phases,
+            "retries": dict(self.retries),
+            "rate_limited": dict(self.rate_limited),
+            "endpoints": {
+                endpoint: {
+                    "requests": stats.latency.count,
+                    "seconds": stats.latency.sum,
+                    "latency_buckets": dict(stats.latency.cumulative()),
+                    "statuses": dict(stats.statuses),
+                    "bytes_sent": stats.bytes_sent,
+                    "bytes_received": stats.bytes_received,
+                }
+                for endpoint, stats in sorted(self.endpoints.items())
+            },
+        }
+
+    def save_json(self, path: Path) -> None:
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def _sample(self, name: str, value: float, **labels: str) -> str:
+        labels = {**self.labels, **labels}
+        text = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+        return f"{name}{{{text}}} {value}" if text else f"{name} {value}"
+
+    def families(self) -> dict[str, tuple[str, str, list[str]]]:
+        """The type, help text and samples of each metric, by name"""
+        families = {}
+
+        def metric(name: str, kind: str, help_text: str) -> list[str]:
+            samples = []
+            families[name] = (kind, help_text, samples)
+            return samples
+
+        name = "notion_sync_request_duration_seconds"
+        samples = metric(name, "histogram", "Time until the response headers arrived")
+        for endpoint, stats in sorted(self.endpoints.items()):
+            for bound, count in stats.latency.cumulative():
+                samples.append(
+                    self._sample(f"{name}_bucket", count, endpoint=endpoint, le=bound)
+                )
+            samples.append(
+                self._sample(f"{name}_sum", stats.latency.sum, endpoint=endpoint)
+            )
+            samples.append(
+                self._sample(f"{name}_count", stats.latency.count, endpoint=endpoint)
+            )
+
+        name = "notion_sync_responses_total"
+        samples = metric(name, "counter", "Responses received, by status code")
+        for endpoint, stats in sorted(self.endpoints.items()):
+            for status, count in sorted(stats.statuses.items()):
+                samples.append(
+                    self._sample(name, count, endpoint=endpoint, status=status)
+                )
+
+        for name, attr, help_text in [
+            ("notion_sync_sent_bytes_total", "bytes_sent", "Request bytes sent"),
+            ("notion_sync_received_bytes_total", "bytes_received", "Bytes received"),
+        ]:
+            samples = metric(name, "counter", help_text)
+            for endpoint, stats in sorted(self.endpoints.items()):
+                samples.append(
+                    self._sample(name, getattr(stats, attr), endpoint=endpoint)
+                )
+
+        for name, values, help_text in [
+            ("notion_sync_retries_total", self.retries, "Requests retried"),
+            ("notion_sync_rate_limited_total", self.rate_limited, "429 responses"),
+        ]:
+            samples = metric(name, "counter", help_text)
+            for phase, count in values.items():
+                samples.append(self._sample(name, count, phase=phase))
+
+        name = "notion_sync_phase_seconds"
+        samples = metric(name, "gauge", "Wall-time of each phase of the sync")
+        for phase, seconds in self.phases.items():
+            samples.append(self._sample(name, seconds, phase=phase))
+
+        name = "notion_sync_last_run_timestamp_seconds"
+        samples = metric(name, "gauge", "When the sync finished")
+        samples.append(self._sample(name, time.time()))
+
+        return families
+
+    def prometheus(self) -> str:
+        """Render the metrics in the Prometheus text exposition format"""
+        return render_prometheus([self])
+
+    def save_prometheus(self, path: Path) -> None:
+        save_prometheus(path, [self])
+
+    def table(self) -> list[str]:
+        """A line per phase, and per endpoint, for printing at the end of a run"""
+        lines = [f"{phase}: {seconds:.1f}s" for phase, seconds in self.phases.items()]
+        for endpoint, stats in sorted(self.endpoints.items()):
+            latency = stats.latency
+            mean = latency.sum / latency.count if latency.count else 0.0
+            lines.append(
+                f"{endpoint}: {latency.count} requests, {mean * 1000:.0f}ms mean, "
+                f"{stats.bytes_sent / 1024:.1f} KiB sent, "
+                f"{stats.bytes_received / 1024:.1f} KiB received"
+            )
+        return lines
+
+
+def render_prometheus(metrics: Iterable[Metrics]) -> str:
+    """Render the metrics of one or more syncs as a single Prometheus text file.
+
+    Each metric is only described once, with the samples of every sync under
+    it, so the syncs need different labels, e.g. `Metrics(tenant=...)`.
+    """
+    families: dict[str, tuple[str, str, list[str]]] = {}
+    for m in metrics:
+        for name, (kind, help_text, samples) in m.families().items():
+            families.setdefault(name, (kind, help_text, []))[2].extend(samples)
+
+    lines = []
+    for name, (kind, help_text, samples) in families.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
+
+
+def save_prometheus(path: Path, metrics: Iterable[Metrics]) -> None:
+    # The textfile collector may read the file at any time, so replace it in
+    # one go
+    path = Path(path)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(render_prometheus(metrics))
+    tmp_path.replace(path)
+
+
+class _CountingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, count):
+        self.stream = stream
+        self.count = count
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self.stream:
+            self.count(len(chunk))
+            yield chunk
+
+    def close(self) -> None:
+        self.stream.close()
+
+
+class _AsyncCountingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, count):
+        self.stream = stream
+        self.count = count
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.count(len(chunk))
+            yield chunk
+
+    async def aclose(self) -> None:
+        await self.stream.aclose()
+
+
+def _request_size(request: httpx.Request) -> int:
+    return int(request.headers.get("content-length", 0))
+
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """Wrap an httpx transport to record every request in `metrics`"""
+
+    def __init__(self, metrics: Metrics, transport: httpx.BaseTransport | None = None):
+        self.metrics = metrics
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = endpoint_label(request.method, request.url)
+        start = time.perf_counter()
+        response = self.transport.handle_request(request)
+        self.metrics.observe(
+            endpoint,
+            time.perf_counter() - start,
+            response.status_code,
+            sent=_request_size(request),
+        )
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_CountingStream(
+                response.stream,
+                lambda size: self.metrics.add_received(endpoint, size),
+            ),
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class AsyncInstrumentedTransport(httpx.AsyncBaseTransport):
+    """Wrap an async httpx transport to record every request in `metrics`"""
+
+    def __init__(
+        self, metrics: Metrics, transport: httpx.AsyncBaseTransport | None = None
+    ):
+        self.metrics = metrics
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = endpoint_label(request.method, request.url)
+        start = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+        self.metrics.observe(
+            endpoint,
+            time.perf_counter() - start,
+            response.status_code,
+            sent=_request_size(request),
+        )
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            stream=_AsyncCountingStream(
+                response.stream,
+                lambda size: self.metrics.add_received(endpoint, size),
+            ),
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
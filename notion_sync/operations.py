@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+# The kinds of write operation the sync scripts send to Notion
+CREATE = "create"
+UPDATE = "update"
+ARCHIVE = "archive"
+SYNC_BODY = "sync_body"
+
+
+@dataclass
+class Operation:
+    """A single write to be sent to the Notion API.
+
+    `payload` holds the keyword arguments for the Notion endpoint, so a create
+    operation carries its own `parent`, `properties`, `children`, etc. `key` is
+    the stable key of the source item the page belongs to, and `title` is only
+    used in messages.
+    """
+
+    kind: str
+    page_id: str | None = None
+    payload: dict[str, Any] = field(default_factory=dict)
+    key: str | None = None
+    title: str = ""
+
+
+def create_page(database_id: str, key: str, title: str, **payload: Any) -> Operation:
+    """Create a new page in the database with id `database_id`"""
+    return Operation(
+        CREATE,
+        payload={"parent": {"database_id": database_id}, **payload},
+        key=key,
+        title=title,
+    )
+
+
+def update_page(page_id: str, key: str, title: str, **payload: Any) -> Operation:
+    """Update the properties of an existing page"""
+    return Operation(UPDATE, page_id=page_id, payload=payload, key=key, title=title)
+
+
+def archive_page(page_id: str, key: str | None = None, title: str = "") -> Operation:
+    """Archive an existing page"""
+    return Operation(
+        ARCHIVE, page_id=page_id, payload={"archived": True}, key=key, title=title
+    )
+
+
+def sync_page_body(
+    page_id: str,
+    key: str,
+    title: str,
+    children: list[dict],
+    managed_blocks: int | None = None,
+) -> Operation:
+    """Make the blocks the sync wrote to the body of an existing page match
+    `children`, given how many blocks at the top of the page it wrote"""
+    payload = {"children": children, "managed_blocks": managed_blocks}
+    return Operation(SYNC_BODY, page_id=page_id, payload=payload, key=key, title=title)
@@ -0,0 +1,77 @@
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import Any
+
+from notion_client import Client
+
+from notion_sync.hashing import normalise_properties
+
+# The most pages Notion returns from a single database query
+MAX_PAGE_SIZE = 100
+
+
+@dataclass(slots=True)
+class NotionPage:
+    """The parts of a page in the Notion database that a sync needs.
+
+    `key` is the value of the property holding the stable key of the source
+    item the page was created from, like its URL. Pages recalled from a sync
+    checkpoint have no `properties`, only the `content_hash` of the properties
+    that were last written to them. The `body_hash` of the blocks last written
+    to a page, and `body_blocks`, how many blocks at the top of its body were
+    written by the sync, are only ever known from a checkpoint.
+    """
+
+    page_id: str
+    title: str
+    key: str | None = None
+    properties: dict[str, Any] = field(default_factory=dict)
+    content_hash: str | None = None
+    body_hash: str | None = None
+    body_blocks: int | None = None
+
+    @classmethod
+    def from_api(
+        cls, page: dict[str, Any], key_property: str | None = None
+    ) -> "NotionPage":
+        """Build a record from a page object returned by the Notion API"""
+        properties = normalise_properties(page["properties"])
+        return cls(
+            page_id=page["id"],
+            title=properties.get("Title", ""),
+            key=properties.get(key_property) if key_property else None,
+            properties=properties,
+        )
+
+
+def iter_results(notion: Client, database_id: str, **kwargs) -> Iterator[dict]:
+    """Lazily yield every page object in a database, one request at a time.
+
+    `kwargs` are passed on to the query, e.g. a `filter` or `filter_properties`.
+    """
+    kwargs.setdefault("page_size", MAX_PAGE_SIZE)
+
+    # has_more is True if there are more pages to process, and next_cursor
+    # contains the position to pick-up querying from
+    resp = notion.databases.query(database_id, **kwargs)
+    yield from resp["results"]
+
+    while resp["has_more"]:
+        resp = notion.databases.query(
+            database_id, start_cursor=resp["next_cursor"], **kwargs
+        )
+        yield from resp["results"]
+
+
+def iter_pages(
+    notion: Client, database_id: str, key_property: str | None = None, **kwargs
+) -> Iterator[NotionPage]:
+    """Lazily yield a compact record for every page in a database.
+
+    Each page's key is read from the `key_property` property. Pages that have
+    already been archived are skipped.
+    """
+    for page in iter_results(notion, database_id, **kwargs):
+        if page.get("archived") or page.get("in_trash"):
+            continue
+        yield NotionPage.from_api(page, key_property)
@@ -0,0 +1,152 @@
+"""Keep the pages built for source items on disk, so unchanged items aren't rebuilt.
+
+Each item's page is stored in SQLite under the item's ID, alongside a digest of
+every input it was built from, so an item whose inputs changed is rebuilt and
+replaces its old entry. The cache is tagged with a version string, e.g. one
+including the template and converter versions, and is emptied when that
+changes. Whenever pages are added, the least recently used are evicted until the
+rest take up no more than `max_bytes`.
+"""
+
+import hashlib
+import json
+import sqlite3
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# SQLite's limit on the parameters of a single statement, in older versions
+MAX_PARAMETERS = 999
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS pages (
+    id TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_last_used ON pages (last_used);
+"""
+
+
+def digest(values: Iterable[Any]) -> str:
+    """A stable hash of the inputs a page was built from
+
+    >>> digest(["a", "b"]) == digest(["a", "b"]) != digest(["ab", ""])
+    True
+    """
+    h = hashlib.sha256()
+    for value in values:
+        h.update(str(value).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class PayloadCache:
+    """A size-bounded, least recently used cache of page payloads in SQLite.
+
+    Pages are read and written in batches, one transaction each, as a sync
+    builds its pages all at once.
+    """
+
+    def __init__(self, path: Path, version: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.version = version
+        self.max_bytes = max_bytes
+        self._conn: sqlite3.Connection | None = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Connections can't be sent to worker processes
+        return {**self.__dict__, "_conn": None}
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Losing the last few writes in a power cut only costs rebuilding them
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT value FROM meta WHERE name = 'version'"
+            ).fetchone()
+            if row is None or row[0] != self.version:
+                # Pages built by a different template or converter
+                conn.execute("DELETE FROM pages")
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                    (self.version,),
+                )
+        return conn
+
+    def get_many(self, digests: dict[str, str]) -> dict[str, dict[str, Any]]:
+        """The pages stored for the given item IDs, if they were built from
+        inputs with the same digests"""
+        found = {}
+        ids = list(digests)
+        with self.conn:
+            self.conn.execute("BEGIN")
+            for start in range(0, len(ids), MAX_PARAMETERS):
+                end = start + MAX_PARAMETERS
+                chunk = ids[start:end]
+                rows = self.conn.execute(
+                    "SELECT id, digest, payload FROM pages "
+                    f"WHERE id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for item_id, item_digest, payload in rows:
+                    if digests[item_id] == item_digest:
+                        found[item_id] = json.loads(payload)
+
+            used = time.time()
+            self.conn.executemany(
+                "UPDATE pages SET last_used = ? WHERE id = ?",
+                ((used, item_id) for item_id in found),
+            )
+        return found
+
+    def put_many(self, pages: Iterable[tuple[str, str, dict[str, Any]]]) -> None:
+        """Store the `(item ID, digest, payload)` of newly built pages, then evict
+        the least recently used pages until the rest fit in `max_bytes`"""
+        used = time.time()
+        rows = []
+        for item_id, item_digest, payload in pages:
+            data = json.dumps(payload, separators=(",", ":"))
+            rows.append((item_id, item_digest, data, len(data), used))
+
+        with self.conn:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self.conn.execute(
+                """
+                DELETE FROM pages WHERE id IN (
+                    SELECT id FROM (
+                        SELECT id, SUM(size) OVER (
+                            ORDER BY last_used DESC, id
+                        ) AS total
+                        FROM pages
+                    ) WHERE total > ?
+                )
+                """,
+                (self.max_bytes,),
+            )
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
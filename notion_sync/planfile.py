@@ -0,0 +1,171 @@
+"""Save a sync plan to a JSON Lines file, and replay it later.
+
+The first line of a plan file is a header holding everything needed to update
+the checkpoint once the plan has been applied. Every other line is one
+operation, along with the phase it belongs to, the size of its payload and an
+estimate of the number of requests it will take.
+
+While a plan is applied, the ID of each operation is appended to a log next to
+the plan file as soon as it succeeds, so applying the same plan again after a
+crash only sends the operations which hadn't finished.
+"""
+
+import json
+import math
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from notion_sync.blocks import MAX_BLOCKS_PER_REQUEST
+from notion_sync.operations import CREATE, SYNC_BODY, Operation
+from notion_sync.planner import Plan
+
+# Bump this whenever the layout of plan files, or of the checkpoint stored in
+# their header, changes
+PLAN_VERSION = 2
+
+# The phases of a plan, in the order they are applied
+PHASES = ("create", "update", "bodies", "archive", "duplicates")
+
+
+def estimate_requests(op: Operation) -> int:
+    """Roughly how many requests an operation will take.
+
+    Syncing a page body also deletes any blocks which have changed, which can't
+    be known without listing them, so this is a lower bound for those.
+    """
+    blocks = math.ceil(len(op.payload.get("children", [])) / MAX_BLOCKS_PER_REQUEST)
+    if op.kind == CREATE:
+        return max(blocks, 1)
+    if op.kind == SYNC_BODY:
+        # One request to list the existing blocks, then the appends
+        return 1 + blocks
+    return 1
+
+
+class PlanError(ValueError):
+    """A plan file which can't be applied"""
+
+
+@dataclass
+class PlanSummary:
+    operations: int = 0
+    bytes: int = 0
+    requests: int = 0
+
+    def add(self, size: int, requests: int) -> None:
+        self.operations += 1
+        self.bytes += size
+        self.requests += requests
+
+
+def write_plan(path: Path, plan: Plan, **header: Any) -> PlanSummary:
+    """Write a plan to `path`, with any extra details given in the header"""
+    summary = PlanSummary()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        header = {"type": "header", "version": PLAN_VERSION, **header}
+        f.write(json.dumps(header, separators=(",", ":")) + "\n")
+
+        op_id = 0
+        for phase in PHASES:
+            for op in getattr(plan, phase):
+                size = len(json.dumps(op.payload, separators=(",", ":")).encode())
+                requests = estimate_requests(op)
+                line = {
+                    "type": "op",
+                    "id": op_id,
+                    "phase": phase,
+                    "kind": op.kind,
+                    "page_id": op.page_id,
+                    "key": op.key,
+                    "title": op.title,
+                    "bytes": size,
+                    "requests": requests,
+                    # The payload goes last so the rest of the line is easy to read
+                    "payload": op.payload,
+                }
+                f.write(json.dumps(line, separators=(",", ":")) + "\n")
+                summary.add(size, requests)
+                op_id += 1
+
+    tmp_path.replace(path)
+    # A fresh plan starts with nothing applied
+    done_path(path).unlink(missing_ok=True)
+    return summary
+
+
+def read_plan(path: Path) -> tuple[dict[str, Any], Plan, dict[int, Operation]]:
+    """Read a plan file, returning its header, the plan and its operations by ID"""
+    plan = Plan()
+    ops = {}
+    with open(path) as f:
+        header = json.loads(f.readline())
+        if header.get("type") != "header" or header.get("version") != PLAN_VERSION:
+            raise PlanError(f"{path} is not a plan file this version can apply")
+
+        for line in f:
+            data = json.loads(line)
+            op = Operation(
+                data["kind"],
+                page_id=data["page_id"],
+                payload=data["payload"],
+                key=data["key"],
+                title=data["title"],
+            )
+            getattr(plan, data["phase"]).append(op)
+            ops[data["id"]] = op
+
+    return header, plan, ops
+
+
+def done_path(path: Path) -> Path:
+    """Where the operations applied from a plan file are logged"""
+    path = Path(path)
+    return path.with_name(path.name + ".done")
+
+
+class DoneLog:
+    """An append-only log of the operations from a plan which have succeeded"""
+
+    def __init__(self, path: Path):
+        self.path = done_path(path)
+
+    def load(self) -> dict[int, str | None]:
+        """Map the ID of every operation already applied to its page ID"""
+        done = {}
+        try:
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A line cut short by a crash, the operation is resent
+                        continue
+                    done[entry["id"]] = entry["page_id"]
+        except FileNotFoundError:
+            pass
+        return done
+
+    def __enter__(self) -> "DoneLog":
+        self._file = open(self.path, "a+")
+        # Don't let a line cut short by a crash swallow the next entry
+        if self._file.tell() > 0:
+            self._file.seek(self._file.tell() - 1)
+            if self._file.read(1) != "\n":
+                self._file.write("\n")
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._file.close()
+
+    def record(self, op_id: int, page_id: str | None) -> None:
+        entry = json.dumps({"id": op_id, "page_id": page_id})
+        self._file.write(entry + "\n")
+        # Make sure the entry survives the process dying straight afterwards
+        self._file.flush()
+        os.fsync(self._file.fileno())
@@ -0,0 +1,143 @@
+from collections import defaultdict
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from notion_sync.blocks import body_hash
+from notion_sync.hashing import content_hash, normalise_properties
+from notion_sync.operations import (
+    Operation,
+    archive_page,
+    create_page,
+    sync_page_body,
+    update_page,
+)
+from notion_sync.pagination import NotionPage
+
+
+@dataclass
+class Plan:
+    """The writes needed to bring the Notion database in line with a source"""
+
+    create: list[Operation] = field(default_factory=list)
+    update: list[Operation] = field(default_factory=list)
+    archive: list[Operation] = field(default_factory=list)
+    duplicates: list[Operation] = field(default_factory=list)
+    bodies: list[Operation] = field(default_factory=list)
+    unchanged: int = 0
+    # Checkpoint entries for the pages which will match the source once the
+    # plan has been applied, keyed by page ID
+    synced: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @property
+    def operations(self) -> list[Operation]:
+        return self.create + self.update + self.bodies + self.archive + self.duplicates
+
+
+def index_pages(pages: Iterable[NotionPage]) -> dict[str | None, list[NotionPage]]:
+    """Group pages by key, keeping the order they were returned in.
+
+    The index is built as the pages stream in, so it's ready as soon as the
+    last page of the database has been fetched.
+    """
+    pages_by_key = defaultdict(list)
+    for page in pages:
+        pages_by_key[page.key].append(page)
+    return pages_by_key
+
+
+def build_plan(
+    database_id: str,
+    source: Mapping[str, dict[str, Any]],
+    pages: Iterable[NotionPage],
+    clean_keys: Iterable[str] = (),
+    skipped_keys: Iterable[str] = (),
+) -> Plan:
+    """Work out which pages to create, update and archive.
+
+    `source` maps the stable key of each item, like its URL, to the keyword
+    arguments used to create its page, e.g. `properties`, `children` and
+    `icon`. Pages are matched to items by the key they hold, so an item which
+    has been renamed is updated rather than archived and created again, and
+    items which share a title don't collide. Only `properties` are sent when
+    updating an existing page, and if there are `children` the body of the
+    page is synced separately, but only when it differs from what was last
+    written to it. Both sides are indexed by key once, so this runs in linear
+    time no matter how large the database is.
+
+    Where several pages share a key, the first is updated and the rest are
+    archived as duplicates. Pages without a key are archived.
+
+    `clean_keys` are keys which are still in the source but are known to be
+    unchanged since the last sync, so they have no payload in `source`. Their
+    pages are left alone, other than archiving any duplicates.
+
+    `skipped_keys` are keys which are still in the source but whose page
+    couldn't be built this time, so they have no payload in `source` either.
+    Their pages are left alone entirely.
+    """
+    plan = Plan()
+    pages_by_key = index_pages(pages)
+    clean_keys = set(clean_keys)
+    skipped_keys = set(skipped_keys)
+
+    for key in clean_keys:
+        page, *duplicates = pages_by_key[key]
+        plan.duplicates.extend(
+            archive_page(dupe.page_id, key, dupe.title) for dupe in duplicates
+        )
+        plan.unchanged += 1
+
+    for key, payload in source.items():
+        desired = normalise_properties(payload["properties"])
+        title = desired.get("Title", "")
+        matches = pages_by_key.get(key)
+
+        if not matches:
+            plan.create.append(create_page(database_id, key, title, **payload))
+            continue
+
+        page, *duplicates = matches
+        plan.duplicates.extend(
+            archive_page(dupe.page_id, key, dupe.title) for dupe in duplicates
+        )
+
+        desired_hash = content_hash(desired)
+        plan.synced[page.page_id] = {
+            "key": key,
+            "title": title,
+            "hash": desired_hash,
+            "keys": sorted(desired),
+        }
+
+        if page.properties:
+            current_hash = content_hash(page.properties, keys=desired.keys())
+        else:
+            current_hash = page.content_hash
+
+        if current_hash != desired_hash:
+            plan.update.append(
+                update_page(page.page_id, key, title, properties=payload["properties"])
+            )
+        else:
+            plan.unchanged += 1
+
+        if "children" in payload:
+            if page.body_hash != body_hash(payload["children"]):
+                plan.bodies.append(
+                    sync_page_body(
+                        page.page_id,
+                        key,
+                        title,
+                        payload["children"],
+                        managed_blocks=page.body_blocks,
+                    )
+                )
+
+    for key, matches in pages_by_key.items():
+        if key not in source and key not in clean_keys and key not in skipped_keys:
+            plan.archive.extend(
+                archive_page(page.page_id, key, page.title) for page in matches
+            )
+
+    return plan
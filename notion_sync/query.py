@@ -0,0 +1,34 @@
+"""Build database queries that only return the pages and properties a sync needs.
+
+Filters are plain dictionaries in the shape the Notion API expects, see
+https://developers.notion.com/reference/post-database-query-filter
+"""
+
+from collections.abc import Iterable
+from datetime import datetime
+from typing import Any
+
+from notion_client import Client
+
+
+def timestamp_filter(timestamp: str, condition: str, value: str) -> dict[str, Any]:
+    """Filter on `created_time` or `last_edited_time`"""
+    return {"timestamp": timestamp, timestamp: {condition: value}}
+
+
+def edited_since(timestamp: str) -> dict[str, Any]:
+    """A filter for pages edited on or after `timestamp`"""
+    # Notion only records last_edited_time to the minute, so include the whole
+    # minute the last run started in
+    start = datetime.fromisoformat(timestamp).replace(second=0, microsecond=0)
+    return timestamp_filter("last_edited_time", "on_or_after", start.isoformat())
+
+
+def property_ids(notion: Client, database_id: str, names: Iterable[str]) -> list[str]:
+    """Look up the IDs of properties, which is how `filter_properties` names them.
+
+    Names which aren't in the database are left out, as nothing can have been
+    written to them.
+    """
+    schema = notion.databases.retrieve(database_id)["properties"]
+    return [schema[name]["id"] for name in dict.fromkeys(names) if name in schema]
@@ -0,0 +1,119 @@
+import asyncio
+import os
+from collections.abc import Callable, Iterable, Iterator
+
+from notion_client import Client
+from rich.console import Console
+
+from notion_sync.metrics import Metrics
+from notion_sync.operations import Operation
+from notion_sync.pagination import NotionPage, iter_pages
+from notion_sync.planner import Plan
+from notion_sync.query import property_ids
+from notion_sync.transport import HTTPSession
+from notion_sync.writer import (
+    NOTION_REQUESTS_PER_SECOND,
+    NotionWriter,
+    PhaseStats,
+    TokenBucket,
+)
+
+
+class NotionSink:
+    """The Notion database a source is synced to.
+
+    Requests are sent through `session`, which the source's requests share
+    too. Several sinks can share a session, so their reads reuse one pool of
+    connections, and a rate limit `bucket`, which their reads and writes all
+    draw from, e.g. when they use the same token.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        database_id: str,
+        console: Console | None = None,
+        base_url: str | None = None,
+        metrics: Metrics | None = None,
+        rate: float = NOTION_REQUESTS_PER_SECOND,
+        bucket: TokenBucket | None = None,
+        session: HTTPSession | None = None,
+    ):
+        self.token = token
+        self.database_id = database_id
+        self.console = console or Console(force_terminal=True)
+        self.base_url = base_url or os.getenv("NOTION_BASE_URL")
+        self.metrics = metrics
+        self.rate = rate
+        self.bucket = bucket
+        self.session = session or HTTPSession()
+        self._property_ids: dict[tuple[str, ...], list[str]] = {}
+
+        # The Notion client sets the client's timeout from its own option
+        options = {
+            "auth": token,
+            "client": self.session.client(metrics, bucket),
+            "timeout_ms": int(self.session.config.timeout * 1000),
+        }
+        if self.base_url:
+            options["base_url"] = self.base_url
+        self.notion = Client(**options)
+
+    def pages(
+        self,
+        key_property: str | None = None,
+        properties: Iterable[str] | None = None,
+        **kwargs,
+    ) -> Iterator[NotionPage]:
+        """Lazily query the pages in the database, reading keys from `key_property`.
+
+        If `properties` are given, only those (along with the title and the key)
+        are fetched. `kwargs` are passed on to the query, e.g. a `filter`.
+        """
+        if properties is not None:
+            names = tuple(dict.fromkeys(["Title", key_property, *properties]))
+            if names not in self._property_ids:
+                self._property_ids[names] = property_ids(
+                    self.notion, self.database_id, [name for name in names if name]
+                )
+            kwargs["filter_properties"] = self._property_ids[names]
+
+        return iter_pages(self.notion, self.database_id, key_property, **kwargs)
+
+    def apply(
+        self,
+        plan: Plan,
+        show_progress: bool = True,
+        on_done: Callable[[Operation], None] | None = None,
+        deadline: float | None = None,
+    ) -> list[PhaseStats]:
+        """Send every write in a plan to Notion, one phase at a time.
+
+        `on_done` is called with each operation as soon as it has succeeded.
+        Phases go from the most to the least important, new pages and updates
+        before archiving, so if no more writes are started after `deadline`
+        (a `time.monotonic()` value) the ones left are the least urgent.
+        """
+        writer = NotionWriter(
+            self.token,
+            rate=self.rate,
+            base_url=self.base_url,
+            console=self.console,
+            metrics=self.metrics,
+            bucket=self.bucket,
+            session=self.session,
+        )
+        return asyncio.run(
+            writer.run(
+                [
+                    ("Creating new pages", plan.create),
+                    ("Updating existing pages", plan.update),
+                    ("Syncing page bodies", plan.bodies),
+                    ("Archiving old pages", plan.archive),
+                    ("Archiving duplicated pages", plan.duplicates),
+                ],
+                show_progress=show_progress,
+                on_done=on_done,
+                deadline=deadline,
+            )
+        )
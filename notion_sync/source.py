@@ -0,0 +1,116 @@
+import multiprocessing
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from notion_sync.transport import HTTPSession
+
+if TYPE_CHECKING:
+    from rich.console import Console
+
+    from notion_sync.metrics import Metrics
+
+# The source being synced, in each worker process of a pool
+_worker_source = None
+
+# Workers are started from a clean process rather than forked, as forking a
+# process whose other threads hold locks, like several tenants syncing at once,
+# can deadlock. forkserver isn't available on Windows.
+_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _init_worker(source: "Source") -> None:
+    global _worker_source
+    _worker_source = source
+
+
+def _build_payload(item: Any) -> "dict[str, Any] | Exception":
+    return _worker_source.try_page_payload(item)
+
+
+class Source:
+    """Somewhere the items to be synced to a Notion database come from.
+
+    Subclasses list their items cheaply with `items`, and only build the full
+    page for an item with `page_payload` when it needs comparing with Notion.
+    Items are matched to pages by a stable key, which is written to the
+    `key_property` property of each page.
+    """
+
+    name = "source"
+    key_property = "URL"
+    # The properties `page_payload` may write, so only those are fetched from
+    # Notion. None fetches every property.
+    properties: tuple[str, ...] | None = None
+    # Where requests made while listing items are recorded, the connections
+    # they are made over, and where problems with items are reported, all set
+    # by the engine
+    metrics: "Metrics | None" = None
+    session: "HTTPSession | None" = None
+    console: "Console | None" = None
+
+    def __getstate__(self) -> dict[str, Any]:
+        # Sent to worker processes to build pages, which make no requests
+        return {**self.__dict__, "metrics": None, "session": None, "console": None}
+
+    def http_client(self) -> httpx.Client:
+        """A client for fetching items, over the engine's connections if set"""
+        if self.session is None:
+            # Not synced by an engine, so there are no connections to share
+            self.session = HTTPSession()
+        return self.session.client(self.metrics)
+
+    def items(self) -> Iterator[tuple[str, str, str, Any]]:
+        """Yield the key, title, change marker and raw data of every item.
+
+        The key must be the value `page_payload` gives the `key_property`
+        property, and never change, like the URL of the item. The marker is any
+        string that changes whenever the item does, like an `updated_at`
+        timestamp.
+        """
+        raise NotImplementedError
+
+    def page_payload(self, item: Any) -> dict[str, Any]:
+        """Build the keyword arguments used to create the page for an item.
+
+        This must include `properties`, and may include `children` and `icon`.
+        Raise a ValueError if the item can't be turned into a page, though any
+        other error only skips the item too.
+        """
+        raise NotImplementedError
+
+    def try_page_payload(self, item: Any) -> "dict[str, Any] | Exception":
+        """Build the page for an item, returning the error if it can't be built.
+
+        Any error is caught, as a malformed item, like one missing a field,
+        shouldn't end the sync of every other item.
+        """
+        try:
+            return self.page_payload(item)
+        except Exception as err:
+            return err
+
+    def page_payloads(
+        self, items: list[Any], workers: int | None = 1, chunksize: int = 64
+    ) -> Iterator["dict[str, Any] | Exception"]:
+        """Build the pages for many items, yielding each payload or error in order.
+
+        With more than one worker (or `None` for one per CPU) the items are
+        sent to a pool of processes in chunks of `chunksize`. The source is
+        pickled once per process, so raw items and payloads must be picklable.
+        """
+        if workers == 1 or len(items) <= chunksize:
+            yield from map(self.try_page_payload, items)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context(_START_METHOD),
+            initializer=_init_worker,
+            initargs=(self,),
+        ) as executor:
+            yield from executor.map(_build_payload, items, chunksize=chunksize)
@@ -0,0 +1,204 @@
+import json
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from notion_sync.blocks import body_hash
+from notion_sync.hashing import content_hash, normalise_properties
+from notion_sync.operations import ARCHIVE, CREATE, SYNC_BODY, Operation
+from notion_sync.pagination import NotionPage
+
+# Bump this whenever the layout of the state file changes, so old checkpoints
+# are discarded rather than misread
+STATE_VERSION = 3
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass
+class SyncState:
+    """A checkpoint of what the last run left the Notion database looking like.
+
+    `pages` maps page IDs to their key, title and a hash of the properties we
+    last wrote (along with which properties were hashed). `markers` maps the
+    keys of source items to a value that changes whenever the item does, like
+    an `updated_at` timestamp. `bodies` maps page IDs to a hash of the blocks we
+    last wrote to the body of the page, and `body_blocks` to how many blocks
+    that was. Those are always the first blocks of the page, anything after
+    them was added by somebody else and is left alone.
+    """
+
+    last_run: str | None = None
+    # When the last full sync started, which incremental runs don't change
+    last_full_run: str | None = None
+    pages: dict[str, dict[str, Any]] = field(default_factory=dict)
+    markers: dict[str, str] = field(default_factory=dict)
+    bodies: dict[str, str] = field(default_factory=dict)
+    # How many blocks at the top of each page the sync wrote. Missing from
+    # older checkpoints, see `blocks.diff_blocks` for what happens then
+    body_blocks: dict[str, int] = field(default_factory=dict)
+    version: int = STATE_VERSION
+
+    @classmethod
+    def load(cls, path: Path) -> "SyncState":
+        """Read a checkpoint, starting afresh if it is missing or unusable"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+
+        if data.get("version") != STATE_VERSION:
+            return cls()
+
+        return cls(**data)
+
+    def save(self, path: Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f)
+        tmp_path.replace(path)
+
+    def restart(self) -> "SyncState":
+        """An empty checkpoint for a full sync starting now, which remembers
+        page bodies.
+
+        Page bodies can't be queried in bulk, so knowing what was last written
+        to them saves listing the blocks of every page.
+        """
+        return SyncState(
+            last_full_run=now(), bodies=self.bodies, body_blocks=self.body_blocks
+        )
+
+    def is_fresh(self, max_age: timedelta) -> bool:
+        """Whether there is a checkpoint to sync incrementally from, with a full
+        sync no more than `max_age` ago.
+
+        Incremental syncs only see pages edited since the last run, so pages
+        deleted in Notion, or anything else they miss, are only caught by a
+        full sync.
+        """
+        if self.last_run is None or self.last_full_run is None:
+            return False
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(self.last_full_run)
+        return age <= max_age
+
+    def merge_pages(
+        self, edited: Iterable[NotionPage]
+    ) -> tuple[list[NotionPage], set[str]]:
+        """Overlay pages edited since the checkpoint on the pages recorded in it.
+
+        Returns every known page, and the keys of pages which no longer match
+        what we last wrote to them.
+        """
+        pages = {
+            page_id: NotionPage(
+                page_id,
+                entry["title"],
+                key=entry["key"],
+                content_hash=entry["hash"],
+                body_hash=self.bodies.get(page_id),
+                body_blocks=self.body_blocks.get(page_id),
+            )
+            for page_id, entry in self.pages.items()
+        }
+        drifted = set()
+
+        for page in edited:
+            entry = self.pages.get(page.page_id)
+            page.body_blocks = self.body_blocks.get(page.page_id)
+            if entry is None:
+                drifted.add(page.key)
+                page.body_hash = self.bodies.get(page.page_id)
+            elif entry["hash"] == content_hash(page.properties, keys=entry["keys"]):
+                page.body_hash = self.bodies.get(page.page_id)
+            else:
+                # Somebody else edited the page, so check its body too
+                drifted.add(page.key)
+            pages[page.page_id] = page
+
+        return list(pages.values()), drifted
+
+    def dirty_keys(
+        self,
+        markers: dict[str, str],
+        pages: Iterable[NotionPage],
+        drifted: set[str],
+    ) -> set[str]:
+        """Keys of items in the source which need to be compared with Notion again"""
+        keys_with_pages = {page.key for page in pages}
+        return {
+            key
+            for key, marker in markers.items()
+            if self.markers.get(key) != marker
+            or key in drifted
+            or key not in keys_with_pages
+        }
+
+    def record(
+        self,
+        started: str,
+        markers: dict[str, str],
+        synced: dict[str, dict[str, Any]],
+        ops: Iterable[Operation],
+        failed: Iterable[Operation],
+    ) -> None:
+        """Update the checkpoint with the outcome of a run.
+
+        `synced` holds the entries for pages which were already up to date or
+        were updated, keyed by page ID. Items whose writes failed don't get
+        their marker recorded, so the next run picks them up again.
+        """
+        failed_ids = {id(op) for op in failed}
+        failed_keys = set()
+
+        for op in ops:
+            if id(op) in failed_ids:
+                failed_keys.add(op.key)
+                if op.kind == SYNC_BODY:
+                    # The sync may have stopped part way through the body
+                    self.bodies.pop(op.page_id, None)
+                    self.body_blocks.pop(op.page_id, None)
+            elif op.kind == CREATE and op.page_id:
+                props = normalise_properties(op.payload["properties"])
+                self.pages[op.page_id] = {
+                    "key": op.key,
+                    "title": op.title,
+                    "hash": content_hash(props),
+                    "keys": sorted(props),
+                }
+                if "children" in op.payload:
+                    self.bodies[op.page_id] = body_hash(op.payload["children"])
+                    self.body_blocks[op.page_id] = len(op.payload["children"])
+            elif op.kind == SYNC_BODY:
+                self.bodies[op.page_id] = body_hash(op.payload["children"])
+                self.body_blocks[op.page_id] = len(op.payload["children"])
+            elif op.kind == ARCHIVE:
+                self.pages.pop(op.page_id, None)
+
+        for page_id, entry in synced.items():
+            if entry["key"] in failed_keys:
+                # Remember the page, but make sure it's compared again next time
+                entry = {**entry, "hash": None}
+            self.pages[page_id] = entry
+
+        self.bodies = {
+            page_id: digest
+            for page_id, digest in self.bodies.items()
+            if page_id in self.pages
+        }
+        self.body_blocks = {
+            page_id: count
+            for page_id, count in self.body_blocks.items()
+            if page_id in self.pages
+        }
+        self.markers = {
+            key: marker for key, marker in markers.items() if key not in failed_keys
+        }
+        self.last_run = started
@@ -0,0 +1,67 @@
+import json
+import pickle
+import re
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+# Matches Jinja-style placeholders such as `{{ book_title }}`
+PLACEHOLDER = re.compile(r"{{\s*(\w+)\s*}}")
+
+SlotPath = tuple[str | int, ...]
+
+
+def find_slots(node: Any, path: SlotPath = ()) -> Iterator[tuple[SlotPath, list[str]]]:
+    """Yield the path to, and the split text of, each string with placeholders.
+
+    The split text alternates between literal text and placeholder names.
+    """
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from find_slots(value, path + (key,))
+    elif isinstance(node, list):
+        for i, value in enumerate(node):
+            yield from find_slots(value, path + (i,))
+    elif isinstance(node, str) and PLACEHOLDER.search(node):
+        yield path, PLACEHOLDER.split(node)
+
+
+class CompiledTemplate:
+    """A JSON template with `{{ name }}` placeholders, parsed once.
+
+    The parsed skeleton is kept pickled, which makes for a quick deep copy, and
+    rendering fills the values in at paths worked out up front. There is no
+    string templating or JSON parsing per render and values never need
+    escaping.
+    """
+
+    def __init__(self, skeleton: Any):
+        self.slots = list(find_slots(skeleton))
+        self.names = {name for _, parts in self.slots for name in parts[1::2]}
+        self._skeleton = pickle.dumps(skeleton, protocol=pickle.HIGHEST_PROTOCOL)
+
+    @classmethod
+    def load(cls, path: Path) -> "CompiledTemplate":
+        with open(path) as f:
+            return cls(json.load(f))
+
+    def render(self, **values: Any) -> Any:
+        missing = self.names.difference(values)
+        if missing:
+            raise KeyError(f"Missing template values: {', '.join(sorted(missing))}")
+
+        result = pickle.loads(self._skeleton)
+        for path, parts in self.slots:
+            parent = result
+            for key in path[:-1]:
+                parent = parent[key]
+
+            if len(parts) == 3 and not parts[0] and not parts[2]:
+                # The whole string is a placeholder, so insert the value as is
+                parent[path[-1]] = values[parts[1]]
+            else:
+                parent[path[-1]] = "".join(
+                    str(values[part]) if i % 2 else part for i, part in enumerate(parts)
+                )
+
+        return result
@@ -0,0 +1,294 @@
+"""Run the syncs of many people, or many databases, in one process.
+
+Each tenant pairs a source with the Notion database it is synced to, and is
+listed in a JSON config file:
+
+    {
+      "concurrency": 4,
+      "tenants": [
+        {
+          "name": "sarah-books",
+          "source": "goodreads",
+          "token_env": "NOTION_TOKEN_SARAH",
+          "database_id": "0123456789abcdef0123456789abcdef",
+          "user_id": "122919504",
+          "rss_key_env": "GOODREADS_RSS_KEY_SARAH"
+        },
+        {
+          "name": "sarah-github",
+          "source": "github-activity",
+          "token_env": "NOTION_TOKEN_SARAH",
+          "database_id": "fedcba9876543210fedcba9876543210"
+        }
+      ]
+    }
+
+Tokens and keys are read from the environment variables named in the config,
+never from the config itself. Goodreads tenants may also set `shelves` and
+`template`, GitHub tenants `data_url`, and any tenant `cache_dir`, which
+defaults to `.cache/<name>`. Relative paths are resolved from the folder the
+config file is in.
+
+Tenants are synced concurrently in threads. Reads from Notion and from the
+sources share one pool of connections, and tenants using the same token share
+its rate limit, so adding a tenant costs little more than the requests it
+makes. Every tenant keeps its own checkpoint and metrics, and one failing
+doesn't stop the rest.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+from rich.console import Console
+from rich.text import Text
+
+from notion_sync.cli import add_sync_options, http_config, load_env
+from notion_sync.engine import SyncEngine, deadline
+from notion_sync.metrics import Metrics, save_prometheus
+from notion_sync.sink import NotionSink
+from notion_sync.source import Source
+from notion_sync.transport import HTTPConfig, HTTPSession
+from notion_sync.writer import NOTION_REQUESTS_PER_SECOND, TokenBucket
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def github_activity_source(config: dict[str, Any], cache_dir: Path) -> Source:
+    from notion_sync.github_activity import DATA_URL, GitHubActivitySource
+
+    return GitHubActivitySource(cache_dir, data_url=config.get("data_url", DATA_URL))
+
+
+def goodreads_source(config: dict[str, Any], cache_dir: Path) -> Source:
+    from notion_sync.goodreads import GoodreadsSource
+
+    shelves = config.get("shelves")
+    if shelves is None:
+        with open(ROOT.joinpath("goodreads", "shelves.txt")) as f:
+            shelves = [line.strip("\n") for line in f.readlines()]
+
+    return GoodreadsSource(
+        user_id=config["user_id"],
+        rss_key=config["rss_key"],
+        shelves=shelves,
+        template_path=config.get(
+            "template", ROOT.joinpath("goodreads", "notion_page_book_template.json")
+        ),
+        cache_dir=cache_dir,
+    )
+
+
+# How to build each kind of source from a tenant's config
+SOURCES: dict[str, Callable[[dict[str, Any], Path], Source]] = {
+    "github-activity": github_activity_source,
+    "goodreads": goodreads_source,
+}
+
+# The settings each kind of source needs, besides those every tenant needs
+REQUIRED_SETTINGS: dict[str, tuple[str, ...]] = {
+    "github-activity": (),
+    "goodreads": ("user_id", "rss_key"),
+}
+
+
+@dataclass
+class Tenant:
+    name: str
+    source: Source
+    token: str
+    database_id: str
+    cache_dir: Path
+    base_url: str | None = None
+
+
+@dataclass
+class TenantResult:
+    name: str
+    metrics: Metrics
+    # Whether every write succeeded, False if the sync raised an error
+    ok: bool
+    seconds: float
+    error: str | None = None
+
+
+def load_tenants(path: Path, env: dict[str, str] | None = None) -> list[Tenant]:
+    """Read the tenants listed in a config file, checking each is complete"""
+    env = os.environ if env is None else env
+    path = Path(path)
+    with open(path) as f:
+        config = json.load(f)
+
+    tenants = []
+    names = set()
+    for entry in config["tenants"]:
+        name = entry.get("name")
+        if not name or name in names:
+            raise ValueError(f"Every tenant in {path} needs a unique name")
+        names.add(name)
+
+        kind = entry.get("source")
+        if kind not in SOURCES:
+            raise ValueError(
+                f"Tenant {name} has an unknown source {kind!r}, "
+                f"expected one of {', '.join(SOURCES)}"
+            )
+
+        # Secrets come from the environment, e.g. {"token_env": "NOTION_TOKEN"}
+        entry = dict(entry)
+        for key in [key for key in entry if key.endswith("_env")]:
+            value = env.get(entry[key])
+            if value is None:
+                raise ValueError(f"{entry[key]} must be set for tenant {name}!")
+            entry[key.removesuffix("_env")] = value
+        for key in ("token", "database_id", *REQUIRED_SETTINGS[kind]):
+            if not entry.get(key):
+                raise ValueError(f"Tenant {name} needs a {key} or {key}_env")
+
+        if "template" in entry:
+            entry["template"] = path.parent.joinpath(entry["template"])
+        cache_dir = path.parent.joinpath(entry.get("cache_dir", f".cache/{name}"))
+        tenants.append(
+            Tenant(
+                name=name,
+                source=SOURCES[kind](entry, cache_dir),
+                token=entry["token"],
+                database_id=entry["database_id"],
+                cache_dir=cache_dir,
+                base_url=entry.get("base_url"),
+            )
+        )
+    return tenants
+
+
+def run_tenants(
+    tenants: list[Tenant],
+    incremental: bool = False,
+    max_age: timedelta = timedelta(days=7),
+    workers: int | None = 1,
+    concurrency: int = 4,
+    rate: float = NOTION_REQUESTS_PER_SECOND,
+    console: Console | None = None,
+    http: HTTPConfig | None = None,
+    time_budget: float | None = None,
+) -> list[TenantResult]:
+    """Sync every tenant, `concurrency` at a time, returning how each went.
+
+    The output of each tenant's sync is printed in one block once it has
+    finished, rather than interleaved with the others. A `time_budget` in
+    seconds is shared by every tenant, counting from when the first starts.
+    """
+    until = deadline(time_budget)
+    console = console or Console(force_terminal=True)
+    # Every tenant's reads from Notion and its source share one pool of
+    # connections. Writes are sent by a pool per sync, as each runs its own
+    # event loop.
+    session = HTTPSession(http)
+    buckets = {tenant.token: TokenBucket(rate) for tenant in tenants}
+    print_lock = threading.Lock()
+
+    def run(tenant: Tenant) -> TenantResult:
+        output = Console(file=io.StringIO(), force_terminal=True, width=console.width)
+        metrics = Metrics(source=tenant.source.name, tenant=tenant.name)
+        sink = NotionSink(
+            tenant.token,
+            tenant.database_id,
+            output,
+            base_url=tenant.base_url,
+            metrics=metrics,
+            rate=rate,
+            bucket=buckets[tenant.token],
+            session=session,
+        )
+        engine = SyncEngine(
+            tenant.source, sink, tenant.cache_dir.joinpath("sync-state.json")
+        )
+
+        error = None
+        start = time.perf_counter()
+        try:
+            ok = engine.run(
+                incremental=incremental,
+                max_age=max_age,
+                show_progress=False,
+                workers=workers,
+                time_budget=None if until is None else until - time.monotonic(),
+            )
+        except Exception as e:
+            # Only this tenant fails, the others carry on
+            output.print(f"[red]Sync failed: {e!r}")
+            ok = False
+            error = repr(e)
+        seconds = time.perf_counter() - start
+
+        for line in metrics.table():
+            output.print(f"[blue]{line}")
+        with print_lock:
+            console.rule(tenant.name)
+            console.print(Text.from_ansi(output.file.getvalue()), end="")
+
+        return TenantResult(tenant.name, metrics, ok, seconds, error=error)
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(run, tenants))
+    finally:
+        session.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m notion_sync",
+        description="Run the syncs listed in a config file, concurrently",
+    )
+    parser.add_argument("config", type=Path, help="JSON file listing the tenants")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        help="How many tenants to sync at once (default: from the config, or 4)",
+    )
+    add_sync_options(parser)
+    args = parser.parse_args(argv)
+
+    load_env()
+    with open(args.config) as f:
+        concurrency = args.concurrency or json.load(f).get("concurrency", 4)
+
+    console = Console(force_terminal=True)
+    results = run_tenants(
+        load_tenants(args.config),
+        incremental=args.incremental,
+        max_age=timedelta(days=args.max_age_days),
+        workers=args.workers or None,
+        concurrency=concurrency,
+        console=console,
+        http=http_config(args),
+        time_budget=args.time_budget,
+    )
+
+    console.rule("Summary")
+    for result in results:
+        status = "[green]ok" if result.ok else "[red]failed"
+        console.print(f"{result.name}: {status}[/] in {result.seconds:.1f}s")
+
+    if args.metrics_json:
+        with open(args.metrics_json, "w") as f:
+            json.dump(
+                {result.name: result.metrics.summary() for result in results},
+                f,
+                indent=2,
+            )
+    if args.metrics_prom:
+        save_prometheus(args.metrics_prom, [result.metrics for result in results])
+
+    sys.exit(0 if all(result.ok for result in results) else 1)
@@ -0,0 +1,162 @@
+"""One pool of keep-alive HTTP connections for every request a sync makes.
+
+An `HTTPSession` is shared by the Notion client, the GitHub activity CSV
+download and the Goodreads feeds, so each host's TLS handshake happens once
+per process rather than once per request, and one set of limits and timeouts
+applies to all of them. Responses are compressed with gzip, or with brotli or
+zstd if the `brotli` or `zstandard` packages are installed, which httpx then
+asks for. HTTP/2 can be turned on if the `h2` package is installed
+(`pip install httpx[http2,brotli]`).
+
+Async clients, used to send writes to Notion, get their own pool with the same
+settings, as connections can't be shared between event loops.
+"""
+
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import httpx
+
+from notion_sync.metrics import AsyncInstrumentedTransport, InstrumentedTransport
+from notion_sync.writer import RETRY_STATUSES, retry_delay
+
+if TYPE_CHECKING:
+    from notion_sync.metrics import Metrics
+    from notion_sync.writer import TokenBucket
+
+
+@dataclass
+class HTTPConfig:
+    # Connections open at once, and kept open between requests, per pool
+    max_connections: int = 20
+    max_keepalive_connections: int = 20
+    # Seconds an idle connection is kept open for
+    keepalive_expiry: float = 60.0
+    connect_timeout: float = 10.0
+    # Seconds to wait for a response, or any other step of a request
+    timeout: float = 60.0
+    http2: bool = False
+
+    def __post_init__(self):
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ValueError(
+                    "HTTP/2 needs the h2 package: pip install httpx[http2]"
+                ) from None
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    @property
+    def timeouts(self) -> httpx.Timeout:
+        return httpx.Timeout(self.timeout, connect=self.connect_timeout)
+
+
+class _SharedTransport(httpx.BaseTransport):
+    """Hand out a transport without letting clients close it when they are done"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        pass
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """Wrap an httpx transport so every request waits for a token from `bucket`.
+
+    Like writes, requests which are rate limited or fail with a transient error
+    are retried, and a 429 pauses everything drawing from the bucket.
+    """
+
+    def __init__(
+        self,
+        bucket: "TokenBucket",
+        transport: httpx.BaseTransport,
+        max_retries: int = 5,
+    ):
+        self.bucket = bucket
+        self.transport = transport
+        self.max_retries = max_retries
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            self.bucket.wait()
+            response = self.transport.handle_request(request)
+            if (
+                response.status_code not in RETRY_STATUSES
+                or attempt == self.max_retries
+            ):
+                return response
+            delay = retry_delay(response, attempt)
+            if response.status_code == 429:
+                self.bucket.pause(delay)
+            response.close()
+            time.sleep(delay)
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class HTTPSession:
+    """A pool of connections, and the settings for clients which use it.
+
+    Clients made by `client` may be closed freely, the pool stays open until
+    the session is closed.
+    """
+
+    def __init__(self, config: HTTPConfig | None = None):
+        self.config = config or HTTPConfig()
+        self.transport = httpx.HTTPTransport(
+            http2=self.config.http2, limits=self.config.limits
+        )
+
+    def client(
+        self,
+        metrics: "Metrics | None" = None,
+        bucket: "TokenBucket | None" = None,
+        **kwargs: Any,
+    ) -> httpx.Client:
+        """A client using the shared pool, recording its requests in `metrics`
+        and waiting for a token from `bucket` before each one, if given"""
+        transport = _SharedTransport(self.transport)
+        # Time requests once they are sent, not while they wait for a token
+        if metrics is not None:
+            transport = InstrumentedTransport(metrics, transport)
+        if bucket is not None:
+            transport = RateLimitedTransport(bucket, transport)
+        kwargs.setdefault("timeout", self.config.timeouts)
+        kwargs.setdefault("follow_redirects", True)
+        return httpx.Client(transport=transport, **kwargs)
+
+    def async_client(
+        self, metrics: "Metrics | None" = None, **kwargs: Any
+    ) -> httpx.AsyncClient:
+        """An async client with its own pool, for use in a single event loop"""
+        transport = httpx.AsyncHTTPTransport(
+            http2=self.config.http2, limits=self.config.limits
+        )
+        if metrics is not None:
+            transport = AsyncInstrumentedTransport(metrics, transport)
+        kwargs.setdefault("timeout", self.config.timeouts)
+        return httpx.AsyncClient(transport=transport, **kwargs)
+
+    def close(self) -> None:
+        self.transport.close()
+
+    def __enter__(self) -> "HTTPSession":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,261 @@
+"""Keep syncing in a long-running process, instead of one cold process per sync.
+
+The source is polled every `interval` seconds. A change to any item's marker
+starts a sync once the source has been quiet for `debounce` seconds, so a burst
+of changes is written in one batch, or once `max_delay` seconds have passed
+since the first unsynced change, so a source that never settles is still
+synced. Every sync after the first is incremental, and the checkpoint, the
+index of Notion pages it holds, and the sources' download caches stay in
+memory between them. A full sync runs every `resync_interval` seconds, to pick
+up edits made directly in Notion.
+
+A small HTTP server can report on the process:
+
+- `/healthz`: the watcher's status as JSON, with a 503 if the last sync failed
+- `/metrics`: the sync metrics in the Prometheus text format, along with how
+  far behind the source Notion is
+"""
+
+import hashlib
+import json
+import signal
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from rich.console import Console
+
+from notion_sync.engine import Snapshot, SyncEngine
+from notion_sync.state import now
+
+
+def fingerprint(markers: dict[str, str]) -> str:
+    """A hash of every item's change marker, which changes when any item does"""
+    digest = hashlib.sha256()
+    for key, marker in sorted(markers.items()):
+        digest.update(f"{key}\0{marker}\n".encode())
+    return digest.hexdigest()
+
+
+@dataclass
+class WatchStatus:
+    started: str
+    last_poll: str | None = None
+    last_sync: str | None = None
+    # Whether the last sync wrote every change, None before the first sync
+    ok: bool | None = None
+    polls: int = 0
+    syncs: int = 0
+    failures: int = 0
+    # Seconds since the oldest change which hasn't been synced yet
+    lag: float = 0.0
+
+
+class Watcher:
+    """Poll a source and sync changes to Notion until stopped"""
+
+    def __init__(
+        self,
+        engine: SyncEngine,
+        interval: float = 300,
+        debounce: float = 60,
+        max_delay: float | None = None,
+        resync_interval: float | None = 3600,
+        max_age: timedelta = timedelta(days=7),
+        workers: int | None = 1,
+        console: Console | None = None,
+    ):
+        self.engine = engine
+        self.interval = interval
+        self.debounce = debounce
+        self.max_delay = max_delay if max_delay is not None else 4 * debounce
+        self.resync_interval = resync_interval
+        self.max_age = max_age
+        self.workers = workers
+        self.console = console or engine.console
+        self.status = WatchStatus(started=now())
+        self.stopped = threading.Event()
+        # The sync metrics are rendered between syncs, rather than by the
+        # server while a sync is updating them
+        self._metrics_text = ""
+
+        self._fingerprint: str | None = None
+        # Monotonic times of the first and last changes since the last sync
+        self._pending_since: float | None = None
+        self._last_change: float | None = None
+        self._last_sync: float | None = None
+        self._last_full_sync: float | None = None
+
+    def stop(self, *args) -> None:
+        self.stopped.set()
+
+    def poll(self) -> Snapshot:
+        """List the source, noting whether anything changed since the last poll"""
+        # The phase timings exported after a sync are those of that sync and
+        # the poll it synced, not a running total for the whole process
+        self.engine.metrics.reset_phases()
+        snapshot = self.engine.fetch()
+        current = fingerprint(snapshot.markers)
+        if current != self._fingerprint:
+            changed = time.monotonic()
+            if self._pending_since is None:
+                self._pending_since = changed
+            self._last_change = changed
+            self._fingerprint = current
+
+        self.status.polls += 1
+        self.status.last_poll = now()
+        return snapshot
+
+    def due(self) -> tuple[bool, bool]:
+        """Whether to sync now, and whether that sync should be a full one"""
+        current = time.monotonic()
+        full = self._last_full_sync is None or (
+            self.resync_interval is not None
+            and current - self._last_full_sync >= self.resync_interval
+        )
+        # The first sync after starting runs straight away, to catch up with
+        # anything that changed while nothing was watching
+        if full or self._last_sync is None:
+            return True, full
+        if self._pending_since is None:
+            return False, False
+        quiet = current - self._last_change >= self.debounce
+        overdue = current - self._pending_since >= self.max_delay
+        return quiet or overdue, False
+
+    def sync(self, snapshot: Snapshot, full: bool) -> bool:
+        """Sync a snapshot of the source, recording the outcome in the status"""
+        # Changes seen after this snapshot was taken are left for the next sync
+        pending_since = self._pending_since
+        self._pending_since = self._last_change = None
+        try:
+            ok = self.engine.run(
+                incremental=not full,
+                max_age=self.max_age,
+                show_progress=False,
+                workers=self.workers,
+                snapshot=snapshot,
+            )
+        except Exception as e:
+            # A failed sync shouldn't stop the process, the next poll retries it
+            self.console.print("[red]Sync failed:", repr(e))
+            ok = False
+
+        synced = time.monotonic()
+        self._last_sync = synced
+        if full and ok:
+            self._last_full_sync = synced
+        if not ok:
+            # Try again once the debounce has passed, even if nothing else
+            # changes, and keep counting the lag from the first change
+            self._last_change = synced
+            self._pending_since = pending_since or synced
+            self.status.failures += 1
+        self.status.syncs += 1
+        self.status.ok = ok
+        self.status.last_sync = now()
+        self._metrics_text = self.engine.metrics.prometheus()
+        return ok
+
+    def step(self) -> bool | None:
+        """Poll the source once, and sync if one is due.
+
+        Returns whether the sync succeeded, or None if there wasn't one.
+        """
+        snapshot = self.poll()
+        should_sync, full = self.due()
+        if should_sync:
+            return self.sync(snapshot, full)
+        return None
+
+    def lag(self) -> float:
+        if self._pending_since is None:
+            return 0.0
+        return time.monotonic() - self._pending_since
+
+    def run(self) -> None:
+        """Poll and sync until SIGTERM or Ctrl-C"""
+        signal.signal(signal.SIGTERM, self.stop)
+        self.console.print(
+            f"[green]Watching {self.engine.source.name}, polling every "
+            f"{self.interval:g}s"
+        )
+        try:
+            while not self.stopped.is_set():
+                try:
+                    self.step()
+                except Exception as e:
+                    # e.g. the source being briefly unreachable
+                    self.console.print("[red]Poll failed:", repr(e))
+                # Poll sooner if a batch of changes is about to become due
+                self.stopped.wait(self.next_wait())
+        except KeyboardInterrupt:
+            pass
+        self.console.print("[green]Stopped watching")
+
+    def next_wait(self) -> float:
+        if self._pending_since is None:
+            return self.interval
+        current = time.monotonic()
+        due = min(
+            self._last_change + self.debounce, self._pending_since + self.max_delay
+        )
+        return max(0.0, min(self.interval, due - current))
+
+    def health(self) -> dict[str, Any]:
+        self.status.lag = self.lag()
+        return asdict(self.status)
+
+    def prometheus(self) -> str:
+        """The metrics of the syncs so far, followed by the watcher's own"""
+        metrics = self.engine.metrics
+        lines = [self._metrics_text.rstrip("\n")] if self._metrics_text else []
+        for name, kind, help_text, value in (
+            ("lag_seconds", "gauge", "Age of the oldest unsynced change", self.lag()),
+            ("polls_total", "counter", "Polls of the source", self.status.polls),
+            ("syncs_total", "counter", "Syncs run", self.status.syncs),
+            ("sync_failures_total", "counter", "Failed syncs", self.status.failures),
+        ):
+            name = f"notion_sync_watch_{name}"
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(metrics._sample(name, value))
+        return "\n".join(lines) + "\n"
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        """Serve /healthz and /metrics from a background thread"""
+        watcher = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def send(self, status: int, body: str, content_type: str) -> None:
+                data = body.encode()
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self) -> None:
+                if self.path == "/healthz":
+                    health = watcher.health()
+                    status = 503 if health["ok"] is False else 200
+                    self.send(status, json.dumps(health), "application/json")
+                elif self.path == "/metrics":
+                    self.send(200, watcher.prometheus(), "text/plain; version=0.0.4")
+                else:
+                    self.send(404, "Not found\n", "text/plain")
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.console.print(
+            f"[green]Serving /healthz and /metrics on http://{host}:{port}"
+        )
+        return server
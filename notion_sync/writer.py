@@ -0,0 +1,313 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import httpx
+from notion_client import AsyncClient
+from notion_client.errors import HTTPResponseError, RequestTimeoutError
+from rich.console import Console
+
+from notion_sync.blocks import MAX_BLOCKS_PER_REQUEST, append_children, sync_body
+from notion_sync.metrics import AsyncInstrumentedTransport, Metrics
+from notion_sync.operations import ARCHIVE, CREATE, SYNC_BODY, UPDATE, Operation
+
+if TYPE_CHECKING:
+    from rich.progress import Progress
+
+    from notion_sync.transport import HTTPSession
+
+# Notion allows an average of three requests per second per integration
+# https://developers.notion.com/reference/request-limits
+NOTION_REQUESTS_PER_SECOND = 3.0
+
+# Responses that are worth retrying: rate limited, conflicts and server errors
+RETRY_STATUSES = {409, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Limit requests to an average of `rate` per second, with bursts of `capacity`.
+
+    A bucket can be shared by several writers, in different threads and event
+    loops, which then share the budget, e.g. all the syncs using one token.
+    """
+
+    def __init__(self, rate: float = NOTION_REQUESTS_PER_SECOND, capacity: int = 3):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        # Only held while counting tokens, never while waiting
+        self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        """Take a token if there is one, otherwise return how long to wait"""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent"""
+        while delay := self._take():
+            await asyncio.sleep(delay)
+
+    def wait(self) -> None:
+        """Block until a request may be sent, for synchronous clients"""
+        while delay := self._take():
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Stop handing out tokens for `seconds`, e.g. after a 429 response"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+
+@dataclass
+class PhaseStats:
+    """Counters describing how one phase of writes went"""
+
+    name: str
+    total: int = 0
+    succeeded: int = 0
+    retries: int = 0
+    rate_limited: int = 0
+    seconds: float = 0.0
+    failed: list[tuple[Operation, Exception]] = field(default_factory=list)
+    # Operations not started before the deadline
+    deferred: list[Operation] = field(default_factory=list)
+
+    @property
+    def throughput(self) -> float:
+        """Completed operations per second"""
+        return self.succeeded / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"{self.name}: {self.succeeded}/{self.total} in {self.seconds:.1f}s "
+            f"({self.throughput:.2f} ops/s, {self.retries} retries, "
+            f"{self.rate_limited} rate limited, {len(self.failed)} failed"
+            + (f", {len(self.deferred)} deferred)" if self.deferred else ")")
+        )
+
+
+def retry_delay(err: HTTPResponseError | httpx.Response | None, attempt: int) -> float:
+    """How long to wait before retrying, preferring the server's Retry-After header
+    on the error or response"""
+    if err is not None:
+        retry_after = err.headers.get("retry-after")
+        if retry_after is not None:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+
+    # Exponential backoff with jitter, capped at 30 seconds
+    return min(2**attempt, 30) * (0.5 + random.random() / 2)
+
+
+class NotionWriter:
+    """Send batches of write operations to Notion concurrently.
+
+    Each phase is worked through by a bounded pool of workers which all draw
+    from a shared token bucket, so the number of requests in flight stays
+    small and the overall rate stays within Notion's request limits.
+    """
+
+    def __init__(
+        self,
+        token: str,
+        *,
+        rate: float = NOTION_REQUESTS_PER_SECOND,
+        burst: int = 3,
+        workers: int = 4,
+        max_retries: int = 5,
+        base_url: str | None = None,
+        console: Console | None = None,
+        metrics: Metrics | None = None,
+        bucket: TokenBucket | None = None,
+        session: "HTTPSession | None" = None,
+    ):
+        options = {"auth": token}
+        base_url = base_url or os.getenv("NOTION_BASE_URL")
+        if base_url:
+            # Used to point the writer at a local stand-in for the Notion API
+            options["base_url"] = base_url
+        if session is not None:
+            # Same settings as the session's pool, but a pool of its own, as
+            # it is only used in this writer's event loop
+            options["client"] = session.async_client(metrics)
+            options["timeout_ms"] = int(session.config.timeout * 1000)
+        elif metrics is not None:
+            options["client"] = httpx.AsyncClient(
+                transport=AsyncInstrumentedTransport(metrics)
+            )
+
+        self.notion = AsyncClient(**options)
+        # Shared with other writers using the same token, if given
+        self.bucket = bucket or TokenBucket(rate, burst)
+        self.workers = workers
+        self.max_retries = max_retries
+        self.console = console or Console(force_terminal=True)
+
+    async def call(self, method, *args, stats: PhaseStats | None = None, **kwargs):
+        """Call a Notion endpoint, retrying rate limited and transient failures"""
+        for attempt in range(self.max_retries + 1):
+            await self.bucket.acquire()
+            try:
+                return await method(*args, **kwargs)
+            except HTTPResponseError as err:
+                if err.status not in RETRY_STATUSES or attempt == self.max_retries:
+                    raise
+                delay = retry_delay(err, attempt)
+                if err.status == 429:
+                    # Everybody waits, not just this worker
+                    self.bucket.pause(delay)
+                    if stats is not None:
+                        stats.rate_limited += 1
+            except RequestTimeoutError:
+                if attempt == self.max_retries:
+                    raise
+                delay = retry_delay(None, attempt)
+
+            if stats is not None:
+                stats.retries += 1
+            await asyncio.sleep(delay)
+
+    async def execute(self, op: Operation, stats: PhaseStats | None = None):
+        """Send a single operation to Notion and return the response"""
+        if op.kind == CREATE:
+            # Pages can only be created with up to 100 blocks, so any more are
+            # appended afterwards
+            children = op.payload.get("children", [])
+            payload = {**op.payload, "children": children[:MAX_BLOCKS_PER_REQUEST]}
+            page = await self.call(self.notion.pages.create, stats=stats, **payload)
+            if len(children) > MAX_BLOCKS_PER_REQUEST:
+                await append_children(
+                    self, page["id"], children[MAX_BLOCKS_PER_REQUEST:], stats
+                )
+            return page
+        if op.kind in (UPDATE, ARCHIVE):
+            return await self.call(
+                self.notion.pages.update, op.page_id, stats=stats, **op.payload
+            )
+        if op.kind == SYNC_BODY:
+            return await sync_body(
+                self,
+                op.page_id,
+                op.payload["children"],
+                stats,
+                managed=op.payload.get("managed_blocks"),
+            )
+        raise ValueError(f"Unknown operation kind: {op.kind}")
+
+    async def run_phase(
+        self,
+        name: str,
+        ops: list[Operation],
+        progress: "Progress | None" = None,
+        on_done: Callable[[Operation], None] | None = None,
+        deadline: float | None = None,
+    ) -> PhaseStats:
+        """Execute all operations in a phase through the worker pool.
+
+        `on_done` is called with each operation as soon as it has succeeded.
+        No operation is started once `time.monotonic()` reaches `deadline`,
+        those in flight are finished and the rest are left in `deferred`.
+        """
+        stats = PhaseStats(name, total=len(ops))
+        if not ops:
+            return stats
+
+        queue: asyncio.Queue[Operation] = asyncio.Queue()
+        for op in ops:
+            queue.put_nowait(op)
+
+        task = progress.add_task(name, total=len(ops)) if progress else None
+
+        async def worker():
+            while deadline is None or time.monotonic() < deadline:
+                try:
+                    op = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    response = await self.execute(op, stats)
+                    if op.kind == CREATE:
+                        # Keep hold of the ID Notion gave the new page
+                        op.page_id = response["id"]
+                    stats.succeeded += 1
+                    if on_done is not None:
+                        on_done(op)
+                except Exception as err:
+                    stats.failed.append((op, err))
+                    self.console.print(f"[red]Failed to {op.kind} {op.title!r}: {err}")
+                if progress is not None:
+                    progress.advance(task)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(ops)))))
+        stats.seconds = time.perf_counter() - start
+
+        while not queue.empty():
+            stats.deferred.append(queue.get_nowait())
+
+        return stats
+
+    async def run(
+        self,
+        phases: list[tuple[str, list[Operation]]],
+        show_progress: bool = True,
+        on_done: Callable[[Operation], None] | None = None,
+        deadline: float | None = None,
+    ) -> list[PhaseStats]:
+        """Execute each phase in turn, printing a throughput summary per phase.
+
+        Phases are run in the order given, so once `deadline` has passed the
+        operations left over are those from the last phases.
+        """
+        results = []
+        try:
+            if show_progress:
+                # Progress bars are only imported when drawn, which they aren't
+                # in CI
+                from rich.progress import Progress
+
+                with Progress(console=self.console) as progress:
+                    for name, ops in phases:
+                        results.append(
+                            await self.run_phase(name, ops, progress, on_done, deadline)
+                        )
+            else:
+                for name, ops in phases:
+                    if ops:
+                        self.console.print(f"[green]{name}...")
+                    results.append(
+                        await self.run_phase(
+                            name, ops, on_done=on_done, deadline=deadline
+                        )
+                    )
+        finally:
+            await self.notion.aclose()
+
+        for stats in results:
+            if stats.total > 0:
+                self.console.print(f"[blue]{stats.summary()}")
+
+        return results
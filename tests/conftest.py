@@ -0,0 +1,123 @@
+"""Fixtures running syncs against the fake Notion API from the benchmarks"""
+
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from rich.console import Console
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT.joinpath("benchmarks")))
+
+import synthetic  # noqa: E402
+from fake_notion import FakeNotion, error  # noqa: E402
+
+from notion_sync.engine import SyncEngine  # noqa: E402
+from notion_sync.github_activity import GitHubActivitySource  # noqa: E402
+from notion_sync.sink import NotionSink  # noqa: E402
+
+
+class FlakyNotion(FakeNotion):
+    """A fake Notion API which can be slow to update some pages, can reject
+    updates to others, and can rate limit the next few requests"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.delays: dict[str, float] = {}
+        self.failing: set[str] = set()
+        # How many of the next requests get a 429
+        self.throttled = 0
+
+    def backdate(self, delta: timedelta = timedelta(hours=1)) -> None:
+        """Make every page look like it was last edited `delta` ago, so it isn't
+        returned to incremental syncs again"""
+        for page in self.pages.values():
+            edited = datetime.fromisoformat(page["last_edited_time"]) - delta
+            page["last_edited_time"] = edited.isoformat(timespec="milliseconds")
+
+    def route(self, method, parts, params, body):
+        if self.throttled:
+            self.throttled -= 1
+            return error(429, "rate_limited", "Rate limited")
+        return super().route(method, parts, params, body)
+
+    def update_page(self, page_id, body):
+        time.sleep(self.delays.get(page_id, 0.0))
+        if page_id in self.failing:
+            return error(400, "validation_error", f"Can't update {page_id}")
+        return super().update_page(page_id, body)
+
+
+class GitHubSync:
+    """Synthetic GitHub activity, published by a fake Notion API, and engines
+    which sync it to the fake database"""
+
+    def __init__(self, fake: FakeNotion, cache_dir: Path, size: int = 100):
+        self.fake = fake
+        self.cache_dir = cache_dir
+        # Only the rows which are synced, so each has a page
+        self.rows = [
+            row
+            for row in synthetic.github_rows(size)
+            if row["state"] == "open"
+            and ("assigned" in row["filter"] or "review_requested" in row["filter"])
+        ]
+        self.publish()
+
+    def publish(self) -> None:
+        self.fake.files["/github-activity.csv"] = synthetic.github_csv(self.rows)
+
+    def rename(self, n: int) -> str:
+        """Rename the nth item, returning its URL. Call `publish` after."""
+        row = self.rows[n]
+        row["raw_title"] += " (renamed)"
+        updated_at = datetime.fromisoformat(row["updated_at"]) + timedelta(days=1)
+        row["updated_at"] = updated_at.isoformat()
+        return row["link"]
+
+    def engine(self) -> SyncEngine:
+        source = GitHubActivitySource(
+            self.cache_dir, data_url=self.fake.url + "/github-activity.csv"
+        )
+        sink = NotionSink(
+            "secret",
+            self.fake.database_id,
+            Console(quiet=True),
+            base_url=self.fake.url,
+            rate=1000,
+        )
+        return SyncEngine(source, sink, self.cache_dir.joinpath("sync-state.json"))
+
+    def run(self, **kwargs) -> bool:
+        """Sync with a fresh engine, then age the pages it wrote, as if the
+        next run was a while later"""
+        ok = self.engine().run(show_progress=False, **kwargs)
+        self.fake.backdate()
+        return ok
+
+    def title(self, link: str) -> str:
+        """The title of the live page for the item with the given URL"""
+        return self.page(link)["properties"]["Title"]["title"][0]["text"]["content"]
+
+    def page(self, link: str) -> dict:
+        """The live page for the item with the given URL"""
+        (page,) = [
+            page
+            for page in self.fake.live_pages()
+            if page["properties"]["URL"]["url"] == link
+        ]
+        return page
+
+
+@pytest.fixture
+def fake():
+    with FlakyNotion() as fake:
+        yield fake
+
+
+@pytest.fixture
+def github(fake, tmp_path):
+    return GitHubSync(fake, tmp_path)
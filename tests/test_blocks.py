@@ -0,0 +1,98 @@
+import asyncio
+
+from rich.console import Console
+
+from notion_sync.blocks import normalise_block
+from notion_sync.operations import sync_page_body
+from notion_sync.writer import NotionWriter
+
+
+def paragraph(text: str, block_type: str = "paragraph") -> dict:
+    return {
+        "type": block_type,
+        block_type: {"rich_text": [{"text": {"content": text}}]},
+    }
+
+
+def image(url: str) -> dict:
+    return {"type": "image", "image": {"type": "external", "external": {"url": url}}}
+
+
+def texts(fake, page_id: str) -> list[str]:
+    """The text of each block of a page, or the URL of an image"""
+    blocks = map(normalise_block, fake.blocks[page_id])
+    return [text or url for _, text, url in blocks]
+
+
+def make_page(fake, *texts: str, note: dict | None = None) -> str:
+    """A page whose body was written by a sync, followed by a note added by hand"""
+    _, page = fake.create_page(
+        {
+            "parent": {"database_id": fake.database_id},
+            "children": [paragraph(text) for text in texts]
+            + [note or paragraph("my note")],
+        }
+    )
+    return page["id"]
+
+
+def sync(fake, page_id: str, *blocks: str | dict, managed: int | None = None) -> None:
+    """Sync a page's body to `blocks`, where strings are paragraphs"""
+    writer = NotionWriter(
+        "secret", rate=1000, base_url=fake.url, console=Console(quiet=True)
+    )
+    children = [paragraph(b) if isinstance(b, str) else b for b in blocks]
+    op = sync_page_body(page_id, "key", "title", children, managed)
+    (stats,) = asyncio.run(writer.run([("Sync", [op])], show_progress=False))
+    assert not stats.failed
+
+
+def test_unchanged_body_keeps_notes_without_a_checkpoint(fake):
+    page_id = make_page(fake, "cover", "summary", "more")
+    sync(fake, page_id, "cover", "summary", "more")
+    assert texts(fake, page_id) == ["cover", "summary", "more", "my note"]
+
+
+def test_changed_body_replaces_the_generated_layout_without_a_checkpoint(fake):
+    page_id = make_page(fake, "cover", "summary", note=paragraph("my note", "quote"))
+    sync(fake, page_id, "cover", "new summary")
+    # The blocks in the generated layout are taken to be the sync's
+    assert texts(fake, page_id) == ["cover", "new summary", "my note"]
+
+
+def test_changed_cover_replaces_the_whole_body_without_a_checkpoint(fake):
+    _, page = fake.create_page(
+        {
+            "parent": {"database_id": fake.database_id},
+            "children": [
+                image("old.jpg"),
+                paragraph("Summary", "heading_2"),
+                paragraph("old summary"),
+                paragraph("more"),
+                paragraph("Notes", "heading_3"),
+                paragraph("my note"),
+            ],
+        }
+    )
+    sync(
+        fake, page["id"], image("new.jpg"), paragraph("Summary", "heading_2"), "summary"
+    )
+    assert texts(fake, page["id"]) == [
+        "new.jpg",
+        "Summary",
+        "summary",
+        "Notes",
+        "my note",
+    ]
+
+
+def test_changed_body_replaces_only_the_blocks_the_sync_wrote(fake):
+    page_id = make_page(fake, "cover", "summary", "more")
+    sync(fake, page_id, "cover", "new summary", managed=3)
+    assert texts(fake, page_id) == ["cover", "new summary", "my note"]
+
+    page_id = make_page(fake, "cover")
+    sync(fake, page_id, "cover", *[f"part {n}" for n in range(150)], managed=1)
+    assert texts(fake, page_id) == ["cover"] + [f"part {n}" for n in range(150)] + [
+        "my note"
+    ]
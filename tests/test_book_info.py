@@ -0,0 +1,46 @@
+import pytest
+
+from notion_sync.book_info import BookInfo, get_clean_book_info, parse_shelf_tags
+
+
+@pytest.mark.parametrize(
+    "title, expected",
+    [
+        ("Dune", BookInfo("Dune", "", "", "")),
+        ("Dune (Dune, #1)", BookInfo("Dune", "", "Dune", "1")),
+        (
+            "The Expanse Omnibus (The Expanse #1-3)",
+            BookInfo("The Expanse Omnibus", "", "The Expanse", "1-3"),
+        ),
+        (
+            "Edge of Dark Water (Mongrels, #0.1)",
+            BookInfo("Edge of Dark Water", "", "Mongrels", "0.1"),
+        ),
+        ("Omnibus (Saga, #0.1-4)", BookInfo("Omnibus", "", "Saga", "0.1-4")),
+        (
+            'Leviathan Wakes: A "Novel" (The Expanse, #1)',
+            BookInfo("Leviathan Wakes", 'A "Novel"', "The Expanse", "1"),
+        ),
+        (
+            "Sapiens: A Brief History of Humankind",
+            BookInfo("Sapiens", "A Brief History of Humankind", "", ""),
+        ),
+        (
+            "Not In A Series (2nd edition)",
+            BookInfo("Not In A Series (2nd edition)", "", "", ""),
+        ),
+        ('The "Hobbit"', BookInfo("The 'Hobbit'", "", "", "")),
+    ],
+)
+def test_book_titles(title, expected):
+    assert get_clean_book_info(title) == expected
+
+
+def test_shelf_tags():
+    tags = parse_shelf_tags(
+        "owned, format-paperback, format-e-book, topic-space, re-read"
+    )
+    assert tags.fiction and tags.owned and tags.reread
+    assert tags.formats == ("paperback", "e:book")
+    assert tags.topics == ("space",)
+    assert not parse_shelf_tags("non-fiction").fiction
@@ -0,0 +1,38 @@
+import io
+
+import synthetic
+from rich.console import Console
+
+from notion_sync.engine import SyncEngine
+from notion_sync.github_csv import iter_open_items
+
+
+def test_rows_without_dates_are_skipped(tmp_path):
+    rows = [
+        {**row, "state": "open", "filter": "assigned"}
+        for row in synthetic.github_rows(3)
+    ]
+    rows[1]["created_at"] = ""
+    path = tmp_path.joinpath("github-activity.csv")
+    path.write_bytes(synthetic.github_csv(rows))
+
+    output = io.StringIO()
+    items = list(iter_open_items(path, Console(file=output)))
+    assert [item["link"] for item in items] == [rows[0]["link"], rows[2]["link"]]
+    assert f"Skipping {rows[1]['link']}: created_at is empty" in output.getvalue()
+
+
+def test_skipped_rows_are_reported_by_the_engine(github):
+    github.rows[1]["created_at"] = ""
+    github.publish()
+    output = io.StringIO()
+    default = github.engine()
+    engine = SyncEngine(
+        default.source, default.sink, default.state_path, console=Console(file=output)
+    )
+
+    assert engine.run(show_progress=False)
+    assert (
+        f"Skipping {github.rows[1]['link']}: created_at is empty" in output.getvalue()
+    )
+    assert len(github.fake.live_pages()) == len(github.rows) - 1
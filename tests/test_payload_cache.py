@@ -0,0 +1,95 @@
+from pathlib import Path
+
+import feedparser
+import pytest
+
+from notion_sync import payload_cache
+from notion_sync.goodreads import GoodreadsSource
+from notion_sync.payload_cache import PayloadCache
+
+TEMPLATE_PATH = Path(__file__).parent.parent.joinpath(
+    "goodreads", "notion_page_book_template.json"
+)
+
+
+class Clock:
+    """Stands in for the time module, so each page is used at a distinct time"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self) -> float:
+        self.now += 1
+        return self.now
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(payload_cache, "time", Clock())
+    cache = PayloadCache(tmp_path.joinpath("pages.sqlite"), version="1")
+    yield cache
+    cache.close()
+
+
+def page(text: str) -> dict:
+    return {"properties": {"Title": text}}
+
+
+def test_changed_inputs_miss(cache):
+    cache.put_many([("a", "digest", page("A")), ("b", "digest", page("B"))])
+    assert cache.get_many({"a": "digest", "b": "changed"}) == {"a": page("A")}
+
+    cache.put_many([("b", "changed", page("New B"))])
+    assert cache.get_many({"b": "changed"}) == {"b": page("New B")}
+
+
+def test_new_version_empties_the_cache(cache):
+    cache.put_many([("a", "digest", page("A"))])
+    cache.close()
+
+    upgraded = PayloadCache(cache.path, version="2")
+    assert upgraded.get_many({"a": "digest"}) == {}
+    upgraded.close()
+    # Nor do the pages come back when going back to the old version
+    assert cache.get_many({"a": "digest"}) == {}
+
+
+def test_least_recently_used_pages_are_evicted(cache):
+    cache.max_bytes = 2 * len('{"properties":{"Title":"A"}}')
+    cache.put_many([("a", "digest", page("A"))])
+    cache.put_many([("b", "digest", page("B"))])
+    # Reading a page counts as using it
+    assert cache.get_many({"a": "digest"})
+
+    cache.put_many([("c", "digest", page("C"))])
+    digests = {item_id: "digest" for item_id in "abc"}
+    assert set(cache.get_many(digests)) == {"a", "c"}
+
+
+def book(n: int, rating: str = "4") -> feedparser.FeedParserDict:
+    return feedparser.FeedParserDict(
+        title=f"Book {n}",
+        author_name=f"Author {n}",
+        book_description=f"<p>About book {n}</p>",
+        book_id=str(n),
+        book_large_image_url=f"https://images.example.com/{n}.jpg",
+        user_shelves="fiction, owned",
+        user_rating=rating,
+        user_date_added="Sat, 04 Mar 2023 10:15:00 -0800",
+        user_read_at="",
+    )
+
+
+def test_cached_and_built_pages_keep_the_order_of_the_items(tmp_path):
+    source = GoodreadsSource("0", "key", [], TEMPLATE_PATH, tmp_path)
+    items = [(book(n), "read") for n in range(6)]
+    expected = [source.page_payload(item) for item in items]
+    list(source.page_payloads(items[::2]))
+
+    # Every other book is cached, and one can't be built at all
+    items[3] = (book(3, rating="not a number"), "read")
+    payloads = list(source.page_payloads(items))
+    source.pages.close()
+
+    assert isinstance(payloads[3], ValueError)
+    assert payloads[:3] + payloads[4:] == expected[:3] + expected[4:]
@@ -0,0 +1,34 @@
+import pytest
+
+from notion_sync.planfile import PlanError
+from notion_sync.state import SyncState
+
+
+def test_plan_is_applied_and_resumed(github, tmp_path):
+    path = tmp_path.joinpath("plan.jsonl")
+    github.engine().export_plan(path)
+    assert not github.fake.live_pages()
+
+    assert github.engine().apply_plan(path, show_progress=False)
+    assert len(github.fake.live_pages()) == len(github.rows)
+    # Applying it again has nothing left to send
+    github.fake.reset_calls()
+    assert github.engine().apply_plan(path, show_progress=False)
+    assert not github.fake.reset_calls()
+
+
+def test_plan_made_before_another_sync_is_refused(github, tmp_path):
+    assert github.run()
+    path = tmp_path.joinpath("plan.jsonl")
+    github.rows = github.rows[:-5]
+    github.publish()
+    github.engine().export_plan(path, incremental=True)
+
+    github.rows = github.rows[:-5]
+    github.publish()
+    assert github.run(incremental=True)
+    state = SyncState.load(github.engine().state_path)
+
+    with pytest.raises(PlanError):
+        github.engine().apply_plan(path, show_progress=False)
+    assert SyncState.load(github.engine().state_path) == state
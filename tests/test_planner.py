@@ -0,0 +1,84 @@
+from notion_sync.blocks import body_hash
+from notion_sync.hashing import content_hash, normalise_properties
+from notion_sync.operations import SYNC_BODY
+from notion_sync.pagination import NotionPage
+from notion_sync.planner import build_plan
+
+
+def payload(title: str, url: str, **extra) -> dict:
+    return {
+        "properties": {
+            "Title": {"title": [{"text": {"content": title}}]},
+            "URL": {"type": "url", "url": url},
+        },
+        **extra,
+    }
+
+
+def page(page_id: str, title: str, url: str | None) -> NotionPage:
+    properties = normalise_properties(payload(title, url)["properties"])
+    return NotionPage(page_id, title, key=url, properties=properties)
+
+
+def test_pages_are_matched_by_key_not_title():
+    source = {
+        "a": payload("Renamed", "a"),
+        "b": payload("Same", "b"),
+        "c": payload("New", "c"),
+    }
+    pages = [
+        page("1", "Original", "a"),
+        page("2", "Same", "b"),
+        page("3", "Same", "b"),
+        page("4", "Gone", "d"),
+        page("5", "No key", None),
+    ]
+    plan = build_plan("db", source, pages)
+
+    assert [(op.page_id, op.title) for op in plan.update] == [("1", "Renamed")]
+    assert plan.unchanged == 1
+    assert [op.key for op in plan.create] == ["c"]
+    assert plan.create[0].payload["parent"] == {"database_id": "db"}
+    assert [op.page_id for op in plan.duplicates] == ["3"]
+    assert sorted(op.page_id for op in plan.archive) == ["4", "5"]
+    assert set(plan.synced) == {"1", "2"}
+
+
+def test_clean_keys_are_left_alone_apart_from_duplicates():
+    pages = [page("1", "A", "a"), page("2", "A", "a"), page("3", "B", "b")]
+    plan = build_plan("db", {}, pages, clean_keys=["a", "b"])
+
+    assert not plan.update and not plan.create and not plan.archive
+    assert [op.page_id for op in plan.duplicates] == ["2"]
+    assert plan.unchanged == 2
+
+
+def test_pages_recalled_from_a_checkpoint_are_compared_by_hash():
+    desired = normalise_properties(payload("A", "a")["properties"])
+    unchanged = NotionPage("1", "A", key="a", content_hash=content_hash(desired))
+    stale = NotionPage("2", "B", key="b", content_hash="old")
+    plan = build_plan(
+        "db", {"a": payload("A", "a"), "b": payload("B", "b")}, [unchanged, stale]
+    )
+
+    assert [op.page_id for op in plan.update] == ["2"]
+
+
+def test_bodies_are_only_synced_when_they_changed():
+    children = [
+        {"type": "paragraph", "paragraph": {"rich_text": [{"text": {"content": "x"}}]}}
+    ]
+    same = page("1", "A", "a")
+    same.body_hash = body_hash(children)
+    changed = page("2", "B", "b")
+    changed.body_hash, changed.body_blocks = "old", 3
+    source = {
+        "a": payload("A", "a", children=children),
+        "b": payload("B", "b", children=children),
+    }
+    plan = build_plan("db", source, [same, changed])
+
+    (op,) = plan.bodies
+    assert (op.kind, op.page_id, op.payload["managed_blocks"]) == (SYNC_BODY, "2", 3)
+    # Only properties are sent in updates
+    assert not plan.update
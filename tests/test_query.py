@@ -0,0 +1,38 @@
+from notion_sync.github_activity import GitHubActivitySource
+from notion_sync.query import property_ids
+
+RETRIEVE = "GET 127.0.0.1/v1/databases/{id}"
+
+
+def add_note(page: dict) -> None:
+    """Add a property to a page by hand, which the sync doesn't write"""
+    page["properties"]["Notes"] = {"id": "notes", "type": "rich_text", "rich_text": []}
+
+
+def test_property_ids_skip_unknown_names(github):
+    assert github.run()
+    sink = github.engine().sink
+    schema = github.fake.retrieve_database(github.fake.database_id)[1]["properties"]
+
+    ids = property_ids(sink.notion, sink.database_id, ["URL", "Missing", "Title"])
+    assert ids == [schema["URL"]["id"], schema["Title"]["id"]]
+
+
+def test_queries_only_fetch_the_properties_a_sync_writes(github):
+    assert github.run()
+    for page in github.fake.live_pages():
+        add_note(page)
+    sink = github.engine().sink
+    properties = GitHubActivitySource.properties
+
+    everything, *_ = sink.pages("URL")
+    assert "Notes" in everything.properties
+
+    github.fake.reset_calls()
+    for _ in range(2):
+        pages = list(sink.pages("URL", properties))
+        assert len(pages) == len(github.rows)
+        assert all(set(page.properties) == set(properties) for page in pages)
+        assert {page.key for page in pages} == {row["link"] for row in github.rows}
+    # The property IDs are only looked up once
+    assert github.fake.reset_calls()[RETRIEVE] == 1
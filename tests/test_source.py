@@ -0,0 +1,48 @@
+from notion_sync import github_activity
+from notion_sync.source import Source
+
+
+class Books(Source):
+    def page_payload(self, item):
+        return {"properties": {"Title": {"title": [{"text": {"content": item.title}}]}}}
+
+
+class Book:
+    def __init__(self, title):
+        self.title = title
+
+
+def test_malformed_items_are_returned_as_errors():
+    payloads = list(Books().page_payloads([Book("a"), object(), Book("c")]))
+    assert isinstance(payloads[1], AttributeError)
+    assert [p["properties"]["Title"] for p in (payloads[0], payloads[2])] == [
+        {"title": [{"text": {"content": "a"}}]},
+        {"title": [{"text": {"content": "c"}}]},
+    ]
+
+
+def break_item(monkeypatch, link: str) -> None:
+    """Make building the page for the item with the given URL fail"""
+    create_page_metadata = github_activity.create_page_metadata
+
+    def metadata(item):
+        if item["link"] == link:
+            raise KeyError("filter")
+        return create_page_metadata(item)
+
+    monkeypatch.setattr(github_activity, "create_page_metadata", metadata)
+
+
+def test_malformed_items_are_skipped_by_the_sync(github, monkeypatch):
+    break_item(monkeypatch, github.rows[3]["link"])
+    assert github.run()
+    assert len(github.fake.live_pages()) == len(github.rows) - 1
+
+
+def test_pages_of_malformed_items_are_kept(github, monkeypatch):
+    assert github.run()
+    pages = {page["id"] for page in github.fake.live_pages()}
+
+    break_item(monkeypatch, github.rows[3]["link"])
+    assert github.run()
+    assert {page["id"] for page in github.fake.live_pages()} == pages
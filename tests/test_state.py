@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+from notion_sync.hashing import content_hash, normalise_properties
+from notion_sync.operations import archive_page, create_page, update_page
+from notion_sync.pagination import NotionPage
+from notion_sync.state import SyncState
+
+
+def ago(**kwargs) -> str:
+    return (datetime.now(timezone.utc) - timedelta(**kwargs)).isoformat()
+
+
+def properties(title: str) -> dict:
+    return {"Title": {"title": [{"text": {"content": title}}]}}
+
+
+def entry(key: str, title: str) -> dict:
+    normalised = normalise_properties(properties(title))
+    return {
+        "key": key,
+        "title": title,
+        "hash": content_hash(normalised),
+        "keys": sorted(normalised),
+    }
+
+
+def test_record_keeps_what_was_written_and_forgets_failures():
+    state = SyncState(pages={"1": entry("a", "A"), "2": entry("b", "B")})
+    create = create_page("db", "c", "C", properties=properties("C"))
+    create.page_id = "3"
+    update = update_page("1", "a", "A2", properties=properties("A2"))
+    archive = archive_page("2", "b", "B")
+
+    state.record(
+        "2024-01-01T00:00:00+00:00",
+        {"a": "m1", "c": "m3"},
+        {"1": entry("a", "A2")},
+        [create, update, archive],
+        failed=[update],
+    )
+
+    assert set(state.pages) == {"1", "3"}
+    assert state.pages["3"] == entry("c", "C")
+    # Compared again next time, even if its marker hasn't changed
+    assert state.pages["1"]["hash"] is None
+    assert state.markers == {"c": "m3"}
+    assert state.last_run == "2024-01-01T00:00:00+00:00"
+
+
+def test_merge_pages_overlays_edited_pages_and_finds_drift():
+    state = SyncState(
+        pages={"1": entry("a", "A"), "2": entry("b", "B")},
+        markers={"a": "m1", "b": "m2"},
+        bodies={"1": "body"},
+    )
+    edited = [
+        # Edited by somebody else
+        NotionPage("2", "B", key="b", properties=normalise_properties(properties("X"))),
+        # Created by hand since
+        NotionPage("3", "C", key="c", properties=normalise_properties(properties("C"))),
+    ]
+    pages, drifted = state.merge_pages(edited)
+
+    by_id = {page.page_id: page for page in pages}
+    assert set(by_id) == {"1", "2", "3"}
+    assert by_id["1"].content_hash == entry("a", "A")["hash"]
+    assert by_id["1"].body_hash == "body"
+    assert drifted == {"b", "c"}
+    assert state.dirty_keys({"a": "m1", "b": "m2", "d": "m4"}, pages, drifted) == {
+        "b",
+        "d",
+    }
+
+
+def test_is_fresh_until_the_last_full_sync_is_too_old():
+    max_age = timedelta(days=7)
+    assert not SyncState().is_fresh(max_age)
+    assert SyncState(last_run=ago(hours=1), last_full_run=ago(days=6)).is_fresh(max_age)
+    # Incremental runs since then don't count
+    assert not SyncState(last_run=ago(hours=1), last_full_run=ago(days=8)).is_fresh(
+        max_age
+    )
+    # Checkpoints from before full syncs were recorded
+    assert not SyncState(last_run=ago(hours=1)).is_fresh(max_age)
+
+
+def test_pages_deleted_in_notion_are_restored_by_the_next_full_sync(github):
+    assert github.run()
+    page = github.page(github.rows[0]["link"])
+    page["archived"] = True
+    total = len(github.rows)
+
+    assert github.run(incremental=True)
+    assert len(github.fake.live_pages()) == total - 1
+
+    # A week of daily incremental runs later
+    state_path = github.engine().state_path
+    state = SyncState.load(state_path)
+    state.last_full_run = ago(days=8)
+    state.save(state_path)
+    assert github.run(incremental=True)
+    assert len(github.fake.live_pages()) == total
+    assert SyncState.load(state_path).is_fresh(timedelta(days=7))
@@ -0,0 +1,104 @@
+import json
+import shutil
+
+import pytest
+from conftest import ROOT, FlakyNotion, GitHubSync
+from rich.console import Console
+
+from notion_sync.tenants import Tenant, load_tenants, run_tenants
+
+ENV = {"NOTION_TOKEN": "secret", "RSS_KEY": "key"}
+
+
+def write_config(tmp_path, *tenants: dict):
+    path = tmp_path.joinpath("config", "tenants.json")
+    path.parent.mkdir()
+    path.write_text(json.dumps({"tenants": list(tenants)}))
+    return path
+
+
+def books(**settings) -> dict:
+    return {
+        "name": "books",
+        "source": "goodreads",
+        "token_env": "NOTION_TOKEN",
+        "database_id": "0123",
+        "user_id": "1",
+        "rss_key_env": "RSS_KEY",
+        **settings,
+    }
+
+
+def test_load_tenants_resolves_paths_from_the_config_folder(tmp_path, monkeypatch):
+    path = write_config(
+        tmp_path,
+        books(template="book.json", cache_dir="cache/books"),
+        {
+            "name": "github",
+            "source": "github-activity",
+            "token_env": "NOTION_TOKEN",
+            "database_id": "4567",
+        },
+    )
+    shutil.copy(
+        ROOT.joinpath("goodreads", "notion_page_book_template.json"),
+        path.parent.joinpath("book.json"),
+    )
+    # Not where the template is
+    monkeypatch.chdir(tmp_path)
+
+    books_tenant, github_tenant = load_tenants(path, ENV)
+    assert books_tenant.token == "secret"
+    assert books_tenant.cache_dir == path.parent.joinpath("cache", "books")
+    assert github_tenant.cache_dir == path.parent.joinpath(".cache", "github")
+    assert github_tenant.database_id == "4567"
+
+
+@pytest.mark.parametrize(
+    "settings, missing",
+    [
+        ({"user_id": None}, "user_id"),
+        ({"rss_key_env": None}, "rss_key"),
+        ({"token_env": None}, "token"),
+    ],
+)
+def test_load_tenants_needs_every_setting(tmp_path, settings, missing):
+    tenant = {key: value for key, value in books(**settings).items() if value}
+    path = write_config(tmp_path, tenant)
+    with pytest.raises(ValueError, match=f"needs a {missing} or {missing}_env"):
+        load_tenants(path, ENV)
+
+
+def test_load_tenants_needs_the_environment_variables(tmp_path):
+    path = write_config(tmp_path, books())
+    with pytest.raises(ValueError, match="RSS_KEY must be set for tenant books"):
+        load_tenants(path, {"NOTION_TOKEN": "secret"})
+
+
+def test_tenants_build_pages_in_worker_processes(tmp_path):
+    with FlakyNotion(seed=1) as first, FlakyNotion(seed=2) as second:
+        syncs = [
+            GitHubSync(fake, tmp_path.joinpath(f"tenant-{n}"), size=300)
+            for n, fake in enumerate((first, second))
+        ]
+        # Enough items to be sent to a pool of processes
+        assert all(len(sync.rows) > 64 for sync in syncs)
+        tenants = [
+            Tenant(
+                name=f"tenant-{n}",
+                source=sync.engine().source,
+                token=f"secret-{n}",
+                database_id=sync.fake.database_id,
+                cache_dir=sync.cache_dir,
+                base_url=sync.fake.url,
+            )
+            for n, sync in enumerate(syncs)
+        ]
+        results = run_tenants(
+            tenants, workers=2, concurrency=2, rate=1000, console=Console(quiet=True)
+        )
+
+        assert all(result.ok for result in results)
+        assert [len(sync.fake.live_pages()) for sync in syncs] == [
+            len(sync.rows) for sync in syncs
+        ]
@@ -0,0 +1,71 @@
+from notion_sync.state import SyncState, now
+
+
+def rename_slowly(github, n: int, delay: float = 1.0) -> None:
+    """Rename the nth item, making its update take `delay` seconds"""
+    link = github.rename(n)
+    github.fake.delays[github.page(link)["id"]] = delay
+
+
+def test_deferred_writes_are_resumed_first(github):
+    assert github.run()
+    total = len(github.rows)
+    rename_slowly(github, 0)
+    github.rows = github.rows[:-5]
+    github.publish()
+
+    # Archiving comes after updates, so is left until the next run
+    assert github.run(incremental=True, time_budget=0.5)
+    assert len(github.fake.live_pages()) == total
+    assert github.engine().queue_path.exists()
+
+    github.fake.reset_calls()
+    assert github.run(incremental=True)
+    assert github.fake.reset_calls()["PATCH 127.0.0.1/v1/pages/{id}"] == 5
+    assert len(github.fake.live_pages()) == total - 5
+    assert not github.engine().queue_path.exists()
+
+
+def test_failed_update_is_retried_after_the_queue(github):
+    assert github.run()
+    rename_slowly(github, 0)
+    link = github.rename(1)
+    github.fake.failing.add(github.page(link)["id"])
+    github.rows = github.rows[:-5]
+    github.publish()
+
+    assert not github.run(incremental=True, time_budget=0.5)
+    assert github.engine().queue_path.exists()
+
+    github.fake.failing.clear()
+    assert github.run(incremental=True)
+    assert not github.engine().queue_path.exists()
+    assert len(github.fake.live_pages()) == len(github.rows)
+    assert github.title(link).endswith("(renamed)")
+
+    # The checkpoint matches the database, so a full sync has nothing to write
+    state = SyncState.load(github.engine().state_path)
+    assert state.markers.keys() == {row["link"] for row in github.rows}
+    github.fake.reset_calls()
+    assert github.run()
+    assert not any(
+        endpoint.startswith("PATCH") for endpoint in github.fake.reset_calls()
+    )
+
+
+def test_queue_older_than_the_checkpoint_is_discarded(github):
+    assert github.run()
+    rename_slowly(github, 0)
+    github.rows = github.rows[:-5]
+    github.publish()
+    assert github.run(incremental=True, time_budget=0.5)
+
+    # As if a plan file had been applied since
+    state_path = github.engine().state_path
+    state = SyncState.load(state_path)
+    state.last_run = now()
+    state.save(state_path)
+
+    assert github.run(incremental=True)
+    assert not github.engine().queue_path.exists()
+    assert len(github.fake.live_pages()) == len(github.rows)
@@ -0,0 +1,47 @@
+from collections import Counter
+
+from rich.console import Console
+
+from notion_sync.metrics import Metrics
+from notion_sync.sink import NotionSink
+from notion_sync.transport import HTTPSession
+from notion_sync.writer import TokenBucket
+
+
+def local_port(response) -> int:
+    """The port the request was sent from, which differs between connections"""
+    return response.extensions["network_stream"].get_extra_info("client_addr")[1]
+
+
+def test_clients_share_the_session_connections(fake):
+    fake.files["/data.csv"] = b"a,b\n"
+    ports = set()
+    with HTTPSession() as session:
+        for _ in range(3):
+            # Closing a client leaves the session's pool open
+            with session.client() as client:
+                response = client.get(fake.url + "/data.csv")
+                assert response.content == b"a,b\n"
+                ports.add(local_port(response))
+    assert len(ports) == 1
+
+
+def test_reads_are_retried_when_rate_limited(github):
+    assert github.run()
+    github.fake.throttled = 1
+    metrics = Metrics()
+    sink = NotionSink(
+        "secret",
+        github.fake.database_id,
+        Console(quiet=True),
+        base_url=github.fake.url,
+        metrics=metrics,
+        bucket=TokenBucket(1000),
+    )
+
+    pages = list(sink.pages("URL", properties=["URL"]))
+    assert len(pages) == len(github.rows)
+    statuses = sum(
+        (stats.statuses for stats in metrics.endpoints.values()), start=Counter()
+    )
+    assert statuses["429"] == 1
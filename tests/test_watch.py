@@ -0,0 +1,121 @@
+import pytest
+
+from notion_sync import watch
+from notion_sync.watch import Watcher
+
+
+class Clock:
+    """Stands in for the time module, so the watcher's waits take no time"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(watch, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def watcher(github, clock):
+    return Watcher(
+        github.engine(), interval=300, debounce=60, max_delay=240, resync_interval=3600
+    )
+
+
+def phase_seconds(watcher: Watcher, phase: str) -> float:
+    (sample,) = [
+        line
+        for line in watcher.prometheus().splitlines()
+        if line.startswith("notion_sync_phase_seconds") and f'phase="{phase}"' in line
+    ]
+    return float(sample.rpartition(" ")[2])
+
+
+def test_first_poll_syncs_straight_away(github, watcher):
+    assert watcher.step() is True
+    assert len(github.fake.live_pages()) == len(github.rows)
+    assert watcher.step() is None
+    assert watcher.status.syncs == 1
+
+
+def test_changes_are_synced_once_the_source_is_quiet(github, watcher, clock):
+    assert watcher.step()
+    link = github.rename(0)
+    github.publish()
+
+    assert watcher.step() is None
+    assert watcher.next_wait() == 60
+    clock.now += 59
+    assert watcher.step() is None
+    assert watcher.next_wait() == 1
+
+    clock.now += 1
+    assert watcher.step() is True
+    assert github.title(link).endswith("(renamed)")
+    assert watcher.lag() == 0.0
+
+
+def test_changes_are_synced_by_the_max_delay(github, watcher, clock):
+    assert watcher.step()
+    # A change every 59 seconds never leaves the source quiet for 60
+    for n in range(5):
+        github.rename(n)
+        github.publish()
+        assert watcher.step() is None
+        clock.now += 59
+
+    assert watcher.lag() == 295
+    assert watcher.step() is True
+    assert all(
+        github.title(row["link"]).endswith("(renamed)") for row in github.rows[:5]
+    )
+
+
+def test_failed_sync_is_retried_after_the_debounce(github, watcher, clock):
+    assert watcher.step()
+    link = github.rename(0)
+    github.publish()
+    github.fake.failing.add(github.page(link)["id"])
+
+    assert watcher.step() is None
+    clock.now += 60
+    assert watcher.step() is False
+    assert watcher.status.failures == 1
+    # The lag still counts from the change
+    assert watcher.lag() == 60
+
+    # Retried without anything else changing
+    assert watcher.step() is None
+    github.fake.failing.clear()
+    clock.now += 60
+    assert watcher.step() is True
+    assert github.title(link).endswith("(renamed)")
+
+
+def test_full_sync_picks_up_pages_deleted_in_notion(github, watcher, clock):
+    assert watcher.step()
+    github.fake.backdate()
+    github.page(github.rows[0]["link"])["archived"] = True
+
+    # Nothing changed in the source
+    clock.now += 300
+    assert watcher.step() is None
+
+    clock.now += 3300
+    assert watcher.step() is True
+    assert len(github.fake.live_pages()) == len(github.rows)
+
+
+def test_phase_timings_are_those_of_the_last_sync(github, watcher, clock):
+    assert watcher.step()
+    watcher.engine.metrics.phases["diff"] += 1000
+
+    clock.now += 3600
+    assert watcher.step()
+    assert phase_seconds(watcher, "diff") < 1000
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from conftest import FlakyNotion
+from rich.console import Console
+
+from notion_sync.operations import create_page, update_page
+from notion_sync.writer import NotionWriter
+
+
+def properties(title: str) -> dict:
+    return {"Title": {"title": [{"text": {"content": title}}]}}
+
+
+def writer(fake, **kwargs) -> NotionWriter:
+    return NotionWriter(
+        "secret", rate=1000, base_url=fake.url, console=Console(quiet=True), **kwargs
+    )
+
+
+def run_phase(writer: NotionWriter, ops, **kwargs):
+    async def run():
+        try:
+            return await writer.run_phase("Writing", ops, **kwargs)
+        finally:
+            await writer.notion.aclose()
+
+    return asyncio.run(run())
+
+
+def pages(fake, n: int) -> list[str]:
+    return [
+        fake.create_page(
+            {"parent": {"database_id": fake.database_id}, "properties": properties("")}
+        )[1]["id"]
+        for _ in range(n)
+    ]
+
+
+def test_rate_limited_requests_are_retried():
+    with FlakyNotion(rate_limit=0.3, retry_after=0.01) as fake:
+        ops = [
+            create_page(fake.database_id, str(n), str(n), properties=properties(str(n)))
+            for n in range(20)
+        ]
+        stats = run_phase(writer(fake), ops)
+
+        assert stats.succeeded == 20 and not stats.failed
+        assert stats.rate_limited > 0 and stats.retries >= stats.rate_limited
+        assert all(op.page_id in fake.pages for op in ops)
+
+
+def test_rejected_requests_fail_without_retrying(fake):
+    ids = pages(fake, 3)
+    fake.failing.add(ids[1])
+    ops = [update_page(id, id, id, properties=properties("new")) for id in ids]
+    done = []
+    stats = run_phase(writer(fake), ops, on_done=done.append)
+
+    assert stats.succeeded == 2 and stats.retries == 0
+    assert [op for op, _ in stats.failed] == [ops[1]]
+    assert done == [ops[0], ops[2]] or done == [ops[2], ops[0]]
+
+
+def test_no_operations_are_started_after_the_deadline(fake):
+    ids = pages(fake, 6)
+    ops = [update_page(id, id, id, properties=properties("new")) for id in ids]
+    fake.reset_calls()
+
+    stats = run_phase(writer(fake), ops, deadline=time.monotonic())
+    assert stats.deferred == ops and stats.succeeded == 0
+    assert not fake.reset_calls()
+
+    # Operations in flight are finished, the rest are deferred
+    fake.delays[ids[0]] = 0.5
+    stats = run_phase(writer(fake, workers=1), ops, deadline=time.monotonic() + 0.2)
+    assert stats.succeeded == 1
+    assert stats.deferred == ops[1:]
+    assert "5 deferred" in stats.summary()